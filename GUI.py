@@ -375,9 +375,17 @@ class StatusIndicator(QWidget):
         # Pulsing animation
         self.pulse_timer = QTimer()
         self.pulse_timer.timeout.connect(self.update_pulse)
-        self.pulse_timer.start(50) 
         self.pulse_alpha = 1.0
         self.pulse_direction = -0.02
+
+    # Only animate while on screen
+    def showEvent(self, event):
+        self.pulse_timer.start(50)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.pulse_timer.stop()
+        super().hideEvent(event)
     
     def update_pulse(self):
         self.pulse_alpha += self.pulse_direction
@@ -1,18 +1,30 @@
-import struct
+from threading import Lock
 from pymodbus.client import ModbusTcpClient
+from regcodec import RegisterCodec, register_runs
+
+HOT_ADDRESS = 106    # first hotspots.py slot, one float per tracked hotspot
+ALARM_ADDRESS = 112  # packed alarm words (alarms.py)
+
 
 class ModbusClient:
-    def __init__(self, host: str, port: int = 502):
+    def __init__(self, host: str, port: int = 502, hotspots: int = 0, alarm_address: int = ALARM_ADDRESS):
         self.host = host
         self.port = port
         self.client = ModbusTcpClient(host=self.host, port=self.port)
+        self.lock = Lock()  # shared with plcio.py's polling thread
 
         # Map states to PLC addresses
         self.address_map = {
             "state1": 100,
             "state2": 102,
-            "state3": 104
+            "state3": 104,
         }
+        # hotspots.py slots, only when hotspots are tracked
+        self.address_map.update({f"hot{i + 1}": HOT_ADDRESS + 2 * i for i in range(hotspots)})
+
+        # Floats with word swap, encoded for all states in one pass
+        self.codec = RegisterCodec("float32", word_swap=True)
+        self.alarm_address = alarm_address
 
         # Buffer to store received temperatures
         self.avg_temp_received = {state: [] for state in self.address_map}
@@ -23,20 +35,22 @@ class ModbusClient:
     def close(self):
         self.client.close()
 
+    def float_registers(self, value: float):
+        """Float -> two registers with word swap"""
+        return self.codec.encode([value]).tolist()
+
     def write_float(self, address: int, value: float):
         """Write a float to two Modbus registers with word swap"""
-        packed = struct.pack(">f", value)
-        regs = struct.unpack(">HH", packed)[::-1]  # swap words
-        return self.client.write_registers(address=address, values=regs)
+        with self.lock:
+            return self.client.write_registers(address=address, values=self.float_registers(value))
 
     def read_float(self, address: int):
         """Read a float from two Modbus registers"""
-        resp = self.client.read_holding_registers(address=address, count=2)
+        with self.lock:
+            resp = self.client.read_holding_registers(address=address, count=2)
         if resp.isError():
             return None
-        regs = resp.registers[::-1]  # swap words back
-        raw = struct.pack(">HH", *regs)
-        return struct.unpack(">f", raw)[0]
+        return float(self.codec.decode(resp.registers)[0])
 
     def receive_temp(self, data: dict):
         """
@@ -55,6 +69,35 @@ class ModbusClient:
 
         print("Received temperatures:", data)
 
+    def block_writes(self, data: dict, alarm_words=()):
+        """(address, registers) runs for the mapped states present in `data`
+        plus the alarm words; registers of missing states are left alone."""
+        states = [state for state in data if state in self.address_map]
+        regs = self.codec.encode([data[state] for state in states]).reshape(len(states), self.codec.words_per_value)
+        writes = [(self.address_map[state], r.tolist()) for state, r in zip(states, regs)]
+        if alarm_words:
+            writes.append((self.alarm_address, list(alarm_words)))
+        return register_runs(writes)
+
+    def send_block(self, data: dict, alarm_words=()):
+        """
+        The temperatures in `data` plus the packed alarm words, one
+        write_registers call per contiguous run of registers, all under the
+        lock. Adjacent temperatures and alarm words go out in a single call,
+        so the PLC never sees them from different frames.
+        """
+        for state, temp in data.items():
+            if state in self.avg_temp_received:
+                self.avg_temp_received[state].append(temp)
+        with self.lock:
+            for address, regs in self.block_writes(data, alarm_words):
+                self.client.write_registers(address=address, values=regs)
+
+    def send_alarms(self, alarm_words):
+        """Only the alarm words, for a faster alarm publish rate"""
+        with self.lock:
+            return self.client.write_registers(address=self.alarm_address, values=list(alarm_words))
+
 
 if __name__ == "__main__":
     PLC_IP = "192.168.3.40"
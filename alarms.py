@@ -0,0 +1,99 @@
+import numpy as np
+
+# Alarm kinds, also the bit order inside each channel's nibble
+KINDS = ("lo", "hi", "hihi", "ror")
+LO, HI, HIHI, ROR = range(len(KINDS))
+_SIGN = np.array([-1.0, 1.0, 1.0, 1.0])  # lo trips below its limit, the rest above
+
+RATE_TAU = 20.0  # seconds, smoothing of the rate-of-rise estimate
+
+
+class AlarmEngine:
+    """Threshold, hysteresis, delay and rate-of-rise alarms for all channels.
+
+    State is kept as (channels, kinds) arrays and update() evaluates every
+    rule of every channel with the same handful of numpy operations, so the
+    cost does not depend on how many rules are configured. A NaN limit
+    disables that rule, a NaN value means the channel has no reading.
+    """
+
+    def __init__(self, names, lo=np.nan, hi=np.nan, hihi=np.nan, rate=np.nan,
+                 hysteresis=1.0, min_duration=0.0, rate_tau=RATE_TAU):
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        n = len(self.names)
+
+        self.limits = np.empty((n, len(KINDS)))
+        self.limits[:] = [lo, hi, hihi, rate]
+        self.hysteresis = np.full(n, float(hysteresis))
+        self.min_duration = np.full(n, float(min_duration))
+        self.rate_tau = rate_tau
+
+        self.latched = np.zeros((n, len(KINDS)), dtype=bool)
+        self.since = np.full((n, len(KINDS)), np.inf)
+        self.active = np.zeros((n, len(KINDS)), dtype=bool)
+        self.changed = np.zeros((n, len(KINDS)), dtype=bool)
+        self.rate = np.zeros(n)          # C/min
+        self.previous = np.full(n, np.nan)
+        self.previous_time = None
+
+    def set_rule(self, name, hysteresis=None, min_duration=None, **limits):
+        """Per-channel override, e.g. set_rule("state1", hi=80, rate=5)"""
+        i = self.index[name]
+        for kind, value in limits.items():
+            self.limits[i, KINDS.index(kind)] = np.nan if value is None else value
+        if hysteresis is not None:
+            self.hysteresis[i] = hysteresis
+        if min_duration is not None:
+            self.min_duration[i] = min_duration
+
+    def _update_rate(self, values, now):
+        if self.previous_time is not None and now > self.previous_time:
+            dt = now - self.previous_time
+            instant = (values - self.previous) * (60.0 / dt)
+            alpha = dt / (self.rate_tau + dt)
+            self.rate += alpha * np.nan_to_num(instant - self.rate)
+        self.rate[np.isnan(values)] = 0.0
+        self.previous = values
+        self.previous_time = now
+
+    def update(self, values, now):
+        """values in channel order (NaN = no reading), now in monotonic seconds.
+
+        Returns the (channels, kinds) bool array of active alarms.
+        """
+        values = np.asarray(values, dtype=float)
+        self._update_rate(values, now)
+
+        measured = np.column_stack([values, values, values, self.rate]) * _SIGN
+        limits = self.limits * _SIGN
+        with np.errstate(invalid="ignore"):
+            trip = measured > limits
+            clear = measured < limits - self.hysteresis[:, None]
+        valid = ~np.isnan(measured) & ~np.isnan(limits)
+
+        latched = (self.latched | trip) & ~clear & valid
+        self.since[latched & ~self.latched] = now
+        self.since[~latched] = np.inf
+        self.latched = latched
+
+        active = latched & (now - self.since >= self.min_duration[:, None])
+        self.changed = active != self.active
+        self.active = active
+        return active
+
+    def transitions(self):
+        """(name, kind, active) for every alarm that changed in the last update"""
+        for i, k in zip(*np.nonzero(self.changed)):
+            yield self.names[i], KINDS[k], bool(self.active[i, k])
+
+    def active_alarms(self):
+        """(name, kind) of every active alarm"""
+        return [(self.names[i], KINDS[k]) for i, k in zip(*np.nonzero(self.active))]
+
+    def words(self):
+        """Active alarms packed LSB first, 4 bits per channel, as uint16 registers"""
+        packed = np.packbits(self.active.ravel(), bitorder="little")
+        if packed.size % 2:
+            packed = np.append(packed, np.uint8(0))
+        return packed.view("<u2").tolist()
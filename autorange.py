@@ -0,0 +1,58 @@
+import numpy as np
+
+from framecontext import HIST_SHIFT
+from thermaldisplay import DisplayEngine
+
+
+class AutoRange:
+    """Display limits following the scene, from the raw histogram of the frame.
+
+    Limits are percentiles of the raw histogram, smoothed over time. The
+    DisplayEngine LUT is only rebuilt when the smoothed limits have moved
+    more than `rebuild_delta` raw counts since the last build.
+    """
+
+    def __init__(self, engine=None, low_pct=1.0, high_pct=99.0, alpha=0.2, min_span=500,
+                 rebuild_delta=50, minraw=26315, maxraw=42315):
+        self.low_pct = low_pct
+        self.high_pct = high_pct
+        self.alpha = alpha
+        self.min_span = min_span
+        self.rebuild_delta = rebuild_delta
+        self.engine = engine if engine is not None else DisplayEngine(minraw=minraw, maxraw=maxraw)
+
+        self.low = float(minraw)
+        self.high = float(maxraw)
+        self.lut_range = None
+        self.rebuilds = 0
+        self._rebuild()
+
+    def _rebuild(self):
+        self.lut_range = (int(self.low), int(self.high))
+        self.engine.set_range(*self.lut_range)
+        self.rebuilds += 1
+
+    def update(self, ctx):
+        """Feed a frame's FrameContext (its shared histogram), return the current (minraw, maxraw)"""
+        cdf = np.cumsum(ctx.histogram)
+        total = cdf[-1]
+        low = np.searchsorted(cdf, total * self.low_pct / 100) << HIST_SHIFT
+        high = (np.searchsorted(cdf, total * self.high_pct / 100) + 1) << HIST_SHIFT
+
+        # Keep a minimum span so a uniform scene does not amplify noise
+        if high - low < self.min_span:
+            center = (high + low) / 2
+            low, high = center - self.min_span / 2, center + self.min_span / 2
+
+        self.low += self.alpha * (low - self.low)
+        self.high += self.alpha * (high - self.high)
+
+        lut_low, lut_high = self.lut_range
+        if (abs(self.low - lut_low) > self.rebuild_delta
+                or abs(self.high - lut_high) > self.rebuild_delta):
+            self._rebuild()
+        return self.lut_range
+
+    def colorize(self, frame, out=None):
+        """Raw uint16 frame (any size) -> BGR through the cached LUT"""
+        return self.engine.colorize(frame, out)
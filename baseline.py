@@ -0,0 +1,157 @@
+import os
+
+import numpy as np
+
+DEFAULT_MODEL = "baseline.npz"
+LEARN_FRAMES = 5400   # 10 minutes at 9 fps per machine state
+Z_THRESHOLD = 4.0
+MIN_STD = 0.2         # C, floor so flat pixels do not flag on sensor noise
+SAVE_FRAMES = 900     # learned frames between checkpoints
+
+
+class _Stats:
+    """Welford running mean / M2 of one baseline, float32 per pixel"""
+
+    def __init__(self, shape, count=0, mean=None, m2=None):
+        self.count = count
+        self.mean = np.zeros(shape, np.float32) if mean is None else mean.astype(np.float32)
+        self.m2 = np.zeros(shape, np.float32) if m2 is None else m2.astype(np.float32)
+        self.inv_std = None  # cached once learning is done
+
+    def scale(self, min_std):
+        if self.inv_std is None:
+            var = self.m2 / max(self.count - 1, 1)
+            self.inv_std = 1.0 / np.maximum(np.sqrt(var), min_std)
+        return self.inv_std
+
+
+class BaselineModel:
+    """What "normal" looks like, per pixel and per machine state.
+
+    Each state learns a per-pixel running mean and variance (Welford,
+    float32) over its first learn_frames frames, then freezes; score()
+    returns the per-pixel z-score of a frame against that state's
+    baseline. Frames come as a FrameContext, whose Celsius frame is
+    shared with the frame's other consumers. All updates are whole-array
+    numpy operations with preallocated buffers, O(pixels) per frame. The
+    model is a few hundred KB per state and survives restarts through
+    save()/load().
+
+    With per_state=False every machine state shares baseline 0.
+    """
+
+    def __init__(self, learn_frames=LEARN_FRAMES, z_threshold=Z_THRESHOLD, min_std=MIN_STD,
+                 per_state=True):
+        self.learn_frames = learn_frames
+        self.z_threshold = z_threshold
+        self.min_std = min_std
+        self.per_state = per_state
+        self.states = {}
+        self.unsaved = 0
+        self._x = None
+        self._delta = None
+        self._tmp = None
+
+    def _buffers(self, shape):
+        if self._x is None or self._x.shape != shape:
+            self._x = np.empty(shape, np.float32)
+            self._delta = np.empty(shape, np.float32)
+            self._tmp = np.empty(shape, np.float32)
+
+    def _stats(self, state, shape):
+        key = state if self.per_state else 0
+        stats = self.states.get(key)
+        if stats is None or stats.mean.shape != shape:
+            stats = self.states[key] = _Stats(shape)
+        return stats
+
+    def learning(self, state=0):
+        stats = self.states.get(state if self.per_state else 0)
+        return stats is None or stats.count < self.learn_frames
+
+    def update(self, ctx, state=0):
+        """Fold a frame (FrameContext) into the state's baseline; False once it is learned"""
+        x = ctx.celsius
+        stats = self._stats(state, x.shape)
+        if stats.count >= self.learn_frames:
+            return False
+        self._buffers(x.shape)
+        stats.count += 1
+        self.unsaved += 1
+        delta, tmp = self._delta, self._tmp
+        np.subtract(x, stats.mean, out=delta)
+        np.multiply(delta, np.float32(1.0 / stats.count), out=tmp)
+        stats.mean += tmp
+        np.subtract(x, stats.mean, out=tmp)
+        tmp *= delta
+        stats.m2 += tmp
+        stats.inv_std = None
+        return True
+
+    def score(self, ctx, state=0):
+        """Per-pixel z-scores of a frame (FrameContext), None while learning.
+
+        The float32 array is a reused buffer, valid until the next call.
+        """
+        if self.learning(state):
+            return None
+        stats = self._stats(state, ctx.celsius.shape)
+        self._buffers(ctx.celsius.shape)
+        z = self._x
+        np.subtract(ctx.celsius, stats.mean, out=z)
+        z *= stats.scale(self.min_std)
+        return z
+
+    def anomalies(self, z):
+        """Pixels beyond the z threshold, either side"""
+        return np.abs(z) > self.z_threshold
+
+    def roi_scores(self, z, rois):
+        """{name: (x0, y0, x1, y1)} -> {name: signed z of the worst pixel}"""
+        scores = {}
+        for name, (x0, y0, x1, y1) in rois.items():
+            region = z[max(y0, 0):y1, max(x0, 0):x1]
+            if region.size:
+                worst = region.flat[np.argmax(np.abs(region))]
+                scores[name] = float(worst)
+        return scores
+
+    def relearn(self, state=None):
+        """Forget one state's baseline, or all of them"""
+        if state is None:
+            self.states.clear()
+        else:
+            self.states.pop(state if self.per_state else 0, None)
+
+    # -------- PERSISTENCE --------
+    def checkpoint(self, path=DEFAULT_MODEL, every=SAVE_FRAMES):
+        """Save from the frame loop every `every` learned frames, and once all states are learned"""
+        if self.unsaved >= every or (self.unsaved and not any(map(self.learning, self.states))):
+            self.save(path)
+
+    def save(self, path=DEFAULT_MODEL):
+        self.unsaved = 0
+        if not self.states:
+            return
+        keys = sorted(self.states)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, states=np.array(keys, dtype=np.int64),
+                 counts=np.array([self.states[k].count for k in keys], dtype=np.int64),
+                 means=np.stack([self.states[k].mean for k in keys]),
+                 m2s=np.stack([self.states[k].m2 for k in keys]),
+                 learn_frames=self.learn_frames, per_state=self.per_state)
+        os.replace(tmp, path)  # a crash mid-save keeps the previous model
+
+    @classmethod
+    def load(cls, path=DEFAULT_MODEL, **kwargs):
+        """Saved model, or a new one if `path` does not exist yet"""
+        if not os.path.exists(path):
+            return cls(**kwargs)
+        with np.load(path) as data:
+            kwargs.setdefault("learn_frames", int(data["learn_frames"]))
+            kwargs.setdefault("per_state", bool(data["per_state"]))
+            model = cls(**kwargs)
+            for key, count, mean, m2 in zip(data["states"], data["counts"], data["means"], data["m2s"]):
+                model.states[int(key)] = _Stats(mean.shape, int(count), mean, m2)
+        print(f"Loaded baseline {path}: states {sorted(model.states)}")
+        return model
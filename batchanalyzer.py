@@ -0,0 +1,229 @@
+import argparse
+import csv
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from alarms import AlarmEngine
+from hotspots import find_hotspots
+from lepton import KELVIN_OFFSET, apply_zone, zone_of
+from pipeline import parse_point
+from sessions import Session
+from spotmeter import SpotMeter, parse_spot, DEFAULT_SPOT
+
+BIN_FRAMES = 9         # frames per timeline row, about one second
+RANGE_FRAMES = 5400    # frames per worker task, a multiple of BIN_FRAMES
+CHUNK = 252            # frames read at once inside a task, rounded to whole bins
+ZONES = ("LEFT", "MIDDLE", "RIGHT")
+
+_sessions = {}  # worker process: path -> Session
+
+
+def _init_worker(sessions):
+    _sessions.update((session.path, session) for session in sessions)
+
+
+class Moments:
+    """count/sum/sum of squares/min/max, mergeable across frame ranges"""
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.sqsum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, count, total, sqsum, lo, hi):
+        self.count += count
+        self.sum += total
+        self.sqsum += sqsum
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+
+    def merge(self, other):
+        self.add(other.count, other.sum, other.sqsum, other.min, other.max)
+
+    def summary(self):
+        if not self.count:
+            return None
+        mean = self.sum / self.count
+        std = math.sqrt(max(self.sqsum / self.count - mean * mean, 0.0))
+        return {"mean": round(mean, 3), "min": round(self.min, 2),
+                "max": round(self.max, 2), "std": round(std, 3), "samples": self.count}
+
+
+# -------- WORKER --------
+def analyze_range(path, start, stop, points, spot, bin_frames=BIN_FRAMES):
+    """One frame range of a session -> (timeline rows, zone moments, point moments).
+
+    Zones are the LEFT/MIDDLE/RIGHT thirds of the native frame, as in
+    distrotion .py; points and hotspots use the rotated frame like the
+    GUIs. Timeline rows are bin means, the hottest spot is the bin max.
+    """
+    session = _sessions.get(path) or Session(path)
+    spots = SpotMeter()
+    spot = parse_spot(spot)
+    xs = [x for _, x, _ in points]
+    ys = [y for _, _, y in points]
+    zones = [Moments() for _ in ZONES]
+    point_moments = [Moments() for _ in points]
+    width = session.shape[1]
+    bounds = [(0, width // 3), (width // 3, 2 * width // 3), (2 * width // 3, width)]
+
+    rows = []
+    chunk = max(CHUNK // bin_frames, 1) * bin_frames
+    for first, times, frames in session.chunks(chunk, start, stop):
+        celsius = frames.astype(np.float32)
+        celsius -= KELVIN_OFFSET
+        celsius *= 0.01
+        zone_means = np.empty((len(frames), len(ZONES)))
+        for i, (x0, x1) in enumerate(bounds):
+            region = celsius[:, :, x0:x1].reshape(len(frames), -1)
+            sums = region.sum(axis=1, dtype=np.float64)
+            zone_means[:, i] = sums / region.shape[1]
+            zones[i].add(region.size, sums.sum(), np.square(region, dtype=np.float64).sum(),
+                         float(region.min()), float(region.max()))
+
+        values = np.full((len(frames), len(points)), np.nan)
+        hottest = np.full((len(frames), 3), np.nan)
+        for n, frame in enumerate(frames):
+            rotated = np.ascontiguousarray(np.rot90(frame, -1))  # cv.ROTATE_90_CLOCKWISE
+            if points:
+                spots.update(rotated)
+                means, _ = spots.measure(xs, ys, spot)
+                values[n] = [apply_zone((mean - KELVIN_OFFSET) / 100, zone_of(x, rotated.shape[1]))
+                             for mean, x in zip(means, xs)]
+            found = find_hotspots(rotated, 1)
+            if found:
+                hottest[n] = ((found[0].peak_raw - KELVIN_OFFSET) / 100,) + found[0].peak_xy
+        for i in range(len(points)):
+            column = values[:, i]
+            point_moments[i].add(len(column), column.sum(), np.square(column).sum(),
+                                 column.min(), column.max())
+
+        for lo in range(0, len(frames), bin_frames):
+            hi = min(lo + bin_frames, len(frames))
+            means = zone_means[lo:hi].mean(axis=0)
+            row = [float(times[lo]), hi - lo, *means, abs(means[0] - means[1]), abs(means[2] - means[1])]
+            row += values[lo:hi].mean(axis=0).tolist() if points else []
+            peak = hottest[lo:hi]
+            if np.isnan(peak[:, 0]).all():
+                row += [math.nan] * 3
+            else:
+                row += peak[np.nanargmax(peak[:, 0])].tolist()
+            rows.append(row)
+    return rows, zones, point_moments
+
+
+# -------- MERGE --------
+def replay_alarms(names, rows, first_value, alarm_limits):
+    """Alarm transitions over the timeline, in order (AlarmEngine needs the history)"""
+    engine = AlarmEngine(names, **alarm_limits)
+    events = []
+    for row in rows:
+        engine.update(row[first_value:first_value + len(names)], row[0])
+        events += [{"time": row[0], "channel": name, "kind": kind, "active": on}
+                   for name, kind, on in engine.transitions()]
+    return events
+
+
+def analyze(paths, points=(), spot=DEFAULT_SPOT, alarm_limits=None, workers=None,
+            bin_frames=BIN_FRAMES, range_frames=RANGE_FRAMES):
+    """Analyze sessions on a process pool -> (report dict, timeline header, rows)"""
+    started = time.perf_counter()
+    workers = workers or os.cpu_count()
+    sessions = [Session(path) for path in paths]
+    range_frames = max(range_frames // bin_frames, 1) * bin_frames  # bins never straddle tasks
+    names = [name for name, _, _ in points]
+    header = (["session", "time", "frames"] + [f"{z.lower()}_mean" for z in ZONES]
+              + ["left_error", "right_error"] + names + ["hot_temp", "hot_x", "hot_y"])
+
+    report = {"sessions": []}
+    timeline = []
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(sessions,)) as pool:
+        tasks = [[pool.submit(analyze_range, session.path, start, start + range_frames,
+                              points, spot, bin_frames)
+                  for start in range(0, len(session), range_frames)]
+                 for session in sessions]
+        for session, futures in zip(sessions, tasks):
+            rows = []
+            zones = [Moments() for _ in ZONES]
+            point_moments = [Moments() for _ in points]
+            for future in futures:
+                part_rows, part_zones, part_points = future.result()
+                rows += part_rows
+                for total, part in zip(zones + point_moments, part_zones + part_points):
+                    total.merge(part)
+
+            summary = {"path": session.path, "frames": len(session),
+                       "start": rows[0][0] if rows else None, "end": rows[-1][0] if rows else None,
+                       "zones": {name: m.summary() for name, m in zip(ZONES, zones)},
+                       "points": {name: m.summary() for name, m in zip(names, point_moments)}}
+            if rows:
+                errors = np.array([row[5:7] for row in rows])
+                summary["uniformity"] = {"left_error_mean": round(float(errors[:, 0].mean()), 3),
+                                         "right_error_mean": round(float(errors[:, 1].mean()), 3),
+                                         "max_edge_error": round(float(errors.mean(axis=1).max()), 3)}
+                hot = np.array([row[-3] for row in rows])
+                if not np.isnan(hot).all():
+                    best = rows[int(np.nanargmax(hot))]
+                    summary["hottest"] = {"time": best[0], "temp": round(best[-3], 2),
+                                          "x": int(best[-2]), "y": int(best[-1])}
+            if alarm_limits:
+                summary["alarms"] = replay_alarms(names + ["hot"], rows, 7, alarm_limits)
+            report["sessions"].append(summary)
+            timeline += [[session.path] + row for row in rows]
+
+    report["workers"] = workers
+    report["elapsed_s"] = round(time.perf_counter() - started, 2)
+    return report, header, timeline
+
+
+def write_report(report, header, timeline, output):
+    os.makedirs(output, exist_ok=True)
+    with open(os.path.join(output, "report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    with open(os.path.join(output, "timeline.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in timeline:
+            writer.writerow([row[0], f"{row[1]:.3f}", row[2]]
+                            + ["" if math.isnan(v) else f"{v:.2f}" for v in row[3:]])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline analysis of recorded sessions")
+    parser.add_argument("sessions", nargs="+", help=".npy/.npz recordings or directories of them")
+    parser.add_argument("--output", default="analysis", help="directory for report.json and timeline.csv")
+    parser.add_argument("--point", action="append", type=parse_point, default=[],
+                        help="name=x,y on the rotated 120x160 frame, e.g. state1=20,80")
+    parser.add_argument("--spot", default=DEFAULT_SPOT, help='"1", "3x3", "5x5" or "r<radius>"')
+    parser.add_argument("--workers", type=int, help="processes, default one per core")
+    parser.add_argument("--bin", type=int, default=BIN_FRAMES, help="frames per timeline row")
+    alarm = parser.add_argument_group("alarm replay on the timeline, every point and the hottest spot")
+    alarm.add_argument("--lo", type=float, default=math.nan, help="low limit, C")
+    alarm.add_argument("--hi", type=float, default=math.nan, help="high limit, C")
+    alarm.add_argument("--hihi", type=float, default=math.nan, help="high-high limit, C")
+    alarm.add_argument("--ror", type=float, default=math.nan, help="rate-of-rise limit, C/min")
+    alarm.add_argument("--hysteresis", type=float, default=1.0, help="C (C/min for --ror)")
+    alarm.add_argument("--delay", type=float, default=0.0, help="minimum duration, seconds")
+    args = parser.parse_args()
+
+    limits = {"lo": args.lo, "hi": args.hi, "hihi": args.hihi, "rate": args.ror}
+    alarm_limits = None
+    if any(not math.isnan(v) for v in limits.values()):
+        alarm_limits = dict(limits, hysteresis=args.hysteresis, min_duration=args.delay)
+
+    report, header, timeline = analyze(args.sessions, args.point, args.spot, alarm_limits,
+                                       args.workers, args.bin)
+    write_report(report, header, timeline, args.output)
+    print(f"Analyzed {sum(s['frames'] for s in report['sessions'])} frames in "
+          f"{report['elapsed_s']} s on {report['workers']} workers -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
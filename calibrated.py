@@ -0,0 +1,58 @@
+import cv2 as cv
+import numpy as np
+
+from lepton import KELVIN_OFFSET, COMPENSATION, zone_of
+
+NEIGHBORHOOD = 5  # native pixels, side of the hover max window
+
+
+def column_gains(width, compensation=COMPENSATION):
+    """Per-column scale/offset so that celsius = raw * scale + offset.
+
+    Folds raw -> Celsius and the zone compensation ((t - b) / m) - 9 of
+    every column into one multiply-add.
+    """
+    scale = np.empty(width, dtype=np.float32)
+    offset = np.empty(width, dtype=np.float32)
+    for x in range(width):
+        c = compensation[zone_of(x, width)]
+        scale[x] = 0.01 / c["m"]
+        offset[x] = -(KELVIN_OFFSET / 100 + c["b"]) / c["m"] - 9
+    return scale, offset
+
+
+class CalibratedFrame:
+    """Compensated float32 Celsius frame at native resolution.
+
+    Built once per frame in update(); lookups afterwards are plain array
+    indexing, so a mouse move costs nothing but the read.
+    """
+
+    def __init__(self, neighborhood=NEIGHBORHOOD):
+        self.kernel = np.ones((neighborhood, neighborhood), np.uint8)
+        self.celsius = None
+        self.local_max = None
+        self.valid = False
+        self._gains = None
+
+    def update(self, rotated):
+        h, w = rotated.shape
+        if self.celsius is None or self.celsius.shape != (h, w):
+            self.celsius = np.empty((h, w), np.float32)
+            self.local_max = np.empty((h, w), np.float32)
+            self._gains = column_gains(w)
+        scale, offset = self._gains
+        np.multiply(rotated, scale, out=self.celsius, casting="unsafe")
+        self.celsius += offset
+        cv.dilate(self.celsius, self.kernel, dst=self.local_max)
+        self.valid = True
+
+    def invalidate(self):
+        """Keep the buffers but refuse lookups until the next update()"""
+        self.valid = False
+
+    def at(self, x, y):
+        """(temperature, neighborhood max) at native pixel x, y"""
+        if not self.valid:
+            return None
+        return float(self.celsius[y, x]), float(self.local_max[y, x])
@@ -0,0 +1,66 @@
+import time
+
+import cv2 as cv
+import numpy as np
+
+BLOCK = 8          # native pixels per block side
+NOISE_RAW = 15     # block mean change (centi-K) that counts as a change, 0.15 C
+MAX_STALE = 1.0    # seconds a static scene may go without being processed
+
+
+class ChangeGate:
+    """Decides per frame whether the scene changed enough to process it.
+
+    The raw frame is compared with the last *processed* frame, not the
+    previous one, so a slow drift accumulates until it crosses the
+    threshold. The per-pixel absolute difference is averaged over
+    BLOCK x BLOCK blocks (cv.resize INTER_AREA), which averages sensor
+    noise away while a small hot spot still moves its block. A frame is
+    always processed after max_stale seconds, so published values are
+    never older than that.
+    """
+
+    def __init__(self, threshold_raw=NOISE_RAW, block=BLOCK, max_stale=MAX_STALE, clock=time.monotonic):
+        self.threshold_raw = threshold_raw
+        self.block = block
+        self.max_stale = max_stale
+        self.clock = clock
+        self.reference = None
+        self.diff = None
+        self.last_processed = -np.inf
+        self.forced = True
+        self.processed = 0
+        self.skipped = 0
+
+    def invalidate(self):
+        """Process the next frame whatever it contains (new points, palette...)"""
+        self.forced = True
+
+    def changed(self, frame):
+        now = self.clock()
+        if (self.forced or self.reference is None or self.reference.shape != frame.shape
+                or now - self.last_processed >= self.max_stale):
+            return self._accept(frame, now)
+        cv.absdiff(frame, self.reference, dst=self.diff)
+        h, w = frame.shape[:2]
+        blocks = cv.resize(self.diff, (max(w // self.block, 1), max(h // self.block, 1)),
+                           interpolation=cv.INTER_AREA)
+        if blocks.max() > self.threshold_raw:
+            return self._accept(frame, now)
+        self.skipped += 1
+        return False
+
+    def _accept(self, frame, now):
+        if self.reference is None or self.reference.shape != frame.shape:
+            self.reference = np.empty_like(frame)
+            self.diff = np.empty_like(frame)
+        np.copyto(self.reference, frame)
+        self.last_processed = now
+        self.forced = False
+        self.processed += 1
+        return True
+
+    def stats(self):
+        total = self.processed + self.skipped
+        return {"processed": self.processed, "skipped": self.skipped,
+                "skipped_pct": round(100 * self.skipped / total, 1) if total else 0.0}
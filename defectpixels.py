@@ -0,0 +1,128 @@
+import argparse
+import os
+
+import cv2 as cv
+import numpy as np
+
+from lepton import FRAME_SHAPE
+
+DEFAULT_MAP = "defect_map.npz"
+NEIGHBORS = 8
+
+
+class DefectPixelMap:
+    """Static map of bad sensor pixels at native resolution.
+
+    Each bad pixel has a fixed set of good neighbor indices; correcting a
+    frame is a gather/mean over those, so the cost depends on the number
+    of bad pixels only.
+    """
+
+    def __init__(self, bad, neighbors, shape=FRAME_SHAPE):
+        self.bad = np.asarray(bad, dtype=np.intp)
+        self.neighbors = np.asarray(neighbors, dtype=np.intp).reshape(len(self.bad), -1)
+        self.shape = tuple(shape)
+
+    def __len__(self):
+        return len(self.bad)
+
+    @classmethod
+    def from_mask(cls, mask):
+        """Build neighbor tables for every True pixel of `mask`"""
+        h, w = mask.shape
+        bad = np.flatnonzero(mask)
+        neighbors = np.empty((len(bad), NEIGHBORS), dtype=np.intp)
+        for i, idx in enumerate(bad):
+            y, x = divmod(int(idx), w)
+            # Grow the window until there are good pixels around
+            for r in range(1, max(h, w)):
+                y0, y1 = max(0, y - r), min(h, y + r + 1)
+                x0, x1 = max(0, x - r), min(w, x + r + 1)
+                ys, xs = np.nonzero(~mask[y0:y1, x0:x1])
+                if len(ys):
+                    break
+            good = (ys + y0) * w + (xs + x0)
+            # Closest first, repeat to fill a fixed-size row
+            order = np.argsort((ys + y0 - y) ** 2 + (xs + x0 - x) ** 2, kind="stable")
+            good = good[order][:NEIGHBORS]
+            neighbors[i] = np.resize(good, NEIGHBORS)
+        return cls(bad, neighbors, mask.shape)
+
+    @classmethod
+    def detect(cls, frames, k=6.0, min_std=0.5):
+        """Find dead, stuck and outlier pixels in a calibration stack.
+
+        frames: (N, H, W) raw frames of a uniform, static scene.
+        """
+        frames = np.asarray(frames, dtype=np.float32)
+        mean = frames.mean(axis=0)
+        std = frames.std(axis=0)
+
+        dead = (frames.min(axis=0) == 0) | (frames.max(axis=0) == 65535)
+        # A live pixel always has some temporal noise
+        stuck = std < min_std * max(float(np.median(std)), 1e-3)
+
+        # Spatial outliers against the local median of the mean image
+        local = cv.medianBlur(mean, 3)
+        diff = mean - local
+        mad = float(np.median(np.abs(diff - np.median(diff)))) * 1.4826
+        outlier = np.abs(diff) > k * max(mad, 1.0)
+
+        return cls.from_mask(dead | stuck | outlier)
+
+    def correct(self, frame, out=None):
+        """Replace bad pixels by the mean of their good neighbors"""
+        if out is None:
+            out = frame.copy()
+        elif out is not frame:
+            out[:] = frame
+        if len(self.bad):
+            flat = out.reshape(-1)
+            total = flat[self.neighbors].sum(axis=1, dtype=np.uint32)
+            flat[self.bad] = (total + NEIGHBORS // 2) // NEIGHBORS
+        return out
+
+    def save(self, path=DEFAULT_MAP):
+        np.savez(path, bad=self.bad, neighbors=self.neighbors, shape=np.array(self.shape))
+
+    @classmethod
+    def load(cls, path=DEFAULT_MAP):
+        data = np.load(path)
+        return cls(data["bad"], data["neighbors"], data["shape"])
+
+
+def load_defect_map(path=DEFAULT_MAP):
+    """Saved map or None when the camera was never calibrated"""
+    if os.path.exists(path):
+        return DefectPixelMap.load(path)
+    return None
+
+
+def main():
+    from framebroker import open_frame_source
+
+    parser = argparse.ArgumentParser(description="Detect defective Lepton pixels")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--out", default=DEFAULT_MAP)
+    args = parser.parse_args()
+
+    print("Point the camera at a uniform surface (or close the shutter)")
+    cap = open_frame_source()
+    frames = []
+    while len(frames) < args.frames:
+        ret, frame = cap.read()
+        if not ret:
+            print("No frame received")
+            break
+        frames.append(frame.copy())
+    cap.release()
+
+    if not frames:
+        return
+    defects = DefectPixelMap.detect(np.stack(frames))
+    defects.save(args.out)
+    print(f"{len(defects)} defective pixels saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
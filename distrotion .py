@@ -1,5 +1,6 @@
 import cv2 as cv
 import numpy as np
+from framecontext import FrameContext
 
 class ThermalCamera:
     def __init__(self):
@@ -44,17 +45,7 @@ class ThermalCamera:
             self.new_camera_matrix, (160, 120), cv.CV_16SC2)
         return map1, map2
     
-    def raw_to_temperature(self, raw_frame):
-        """Convert raw Y16 values to temperature in Celsius using your calibration"""
-        # Your specific calibration: minraw = 26315 (-10°C), maxraw = 47315 (200°C)
-        minraw = 26315  # -10 celsius
-        maxraw = 47315  # 200 celsius
-        
-        # Linear interpolation to get temperature in Celsius
-        temperature_celsius = ((raw_frame - minraw) / (maxraw - minraw)) * (200 - (-10)) + (-10)
-        return temperature_celsius
-    
-    def split_thermal_frame(self, raw_frame, show_regions=False):
+    def split_thermal_frame(self, raw_frame, show_regions=False, ctx=None):
         """Split thermal frame into 3 parts and return temperature data"""
         h, w = raw_frame.shape
         third_w = w // 3
@@ -66,7 +57,10 @@ class ThermalCamera:
         
         if show_regions:
             # Create visualization using your display method
-            display_frame, _ = self.thermal_to_display(raw_frame)
+            if ctx is not None:
+                display_frame = ctx.colorized.copy()
+            else:
+                display_frame, _ = self.thermal_to_display(raw_frame)
             
             # Draw region boundaries
             cv.line(display_frame, (third_w, 0), (third_w, h), (255, 255, 255), 1)
@@ -94,27 +88,16 @@ class ThermalCamera:
         thermal_frame = cv.applyColorMap(frame_8, cv.COLORMAP_JET)
         return thermal_frame, frame_8
     
-    def calculate_thermal_stats(self, raw_region, region_name=""):
-        """Calculate temperature statistics for a thermal region using raw values"""
-        # Convert raw values to temperature for statistics
-        temp_region = self.raw_to_temperature(raw_region.astype(np.float32))
-        
-        mean_temp = np.mean(temp_region)
-        min_temp = np.min(temp_region)
-        max_temp = np.max(temp_region)
-        std_temp = np.std(temp_region)
-        
-        stats = {
-            'region': region_name,
-            'mean': mean_temp,
-            'min': min_temp,
-            'max': max_temp,
-            'std': std_temp,
-            'pixels': raw_region.size
-        }
-        
-        return stats
-    
+    def region_stats(self, ctx, show_regions=False):
+        """LEFT/MIDDLE/RIGHT statistics from the frame context"""
+        h, w = ctx.raw.shape
+        third_w = w // 3
+        if show_regions:
+            self.split_thermal_frame(ctx.raw, True, ctx)
+
+        bounds = [("LEFT", 0, third_w), ("MIDDLE", third_w, 2*third_w), ("RIGHT", 2*third_w, w)]
+        return [dict(ctx.roi_stats(x0, 0, x1, h), region=name) for name, x0, x1 in bounds]
+
     def compare_thermal_regions(self, left_stats, middle_stats, right_stats):
         """Compare temperature statistics between regions"""
         print(f"\n=== Thermal Analysis (°C) ===")
@@ -170,15 +153,15 @@ class ThermalCamera:
                 corrected_frame = raw_frame
                 display_title = "Thermal (Original)"
             
-            # Create display version using your exact method
-            colored_frame, frame_8 = self.thermal_to_display(corrected_frame)
+            # Derived products are computed once and shared below
+            ctx = FrameContext(corrected_frame, frame_count, minraw=26315, maxraw=47315)
+            colored_frame = ctx.colorized
             
             # Resize for better visibility
             colored_frame = cv.resize(colored_frame, (480, 360), interpolation=cv.INTER_NEAREST)
             
-            # Convert to temperature for display info
-            temp_frame = self.raw_to_temperature(corrected_frame.astype(np.float32))
-            min_temp, max_temp = np.min(temp_frame), np.max(temp_frame)
+            # Temperature range info
+            min_temp, max_temp = ctx.extremes["min_celsius"], ctx.extremes["max_celsius"]
             
             # Add temperature range info
             cv.putText(colored_frame, f"Min: {min_temp:.1f}C", (10, 20), 
@@ -194,11 +177,7 @@ class ThermalCamera:
             
             # Perform region analysis every 30 frames
             if show_analysis and frame_count % 30 == 0:
-                left, middle, right = self.split_thermal_frame(corrected_frame, show_regions)
-                
-                left_stats = self.calculate_thermal_stats(left, "LEFT")
-                middle_stats = self.calculate_thermal_stats(middle, "MIDDLE") 
-                right_stats = self.calculate_thermal_stats(right, "RIGHT")
+                left_stats, middle_stats, right_stats = self.region_stats(ctx, show_regions)
                 
                 self.compare_thermal_regions(left_stats, middle_stats, right_stats)
             
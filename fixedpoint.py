@@ -0,0 +1,97 @@
+import cv2 as cv
+import numpy as np
+
+from lepton import KELVIN_OFFSET, COMPENSATION
+
+# Everything in this module is in centi-degrees Celsius (int), the raw
+# Lepton centi-Kelvin value minus KELVIN_OFFSET. Floats only at output.
+M_SCALE = 1000        # compensation slope stored as m * 1000
+ZONE_OFFSET_CC = 900  # the "- 9" of apply_zone
+
+
+def _round_div(num, den):
+    """Integer division rounded half away from zero, scalars or int arrays"""
+    if isinstance(num, np.ndarray):
+        return np.where(num >= 0, (2 * num + den) // (2 * den), -((-2 * num + den) // (2 * den)))
+    if num >= 0:
+        return (2 * num + den) // (2 * den)
+    return -((-2 * num + den) // (2 * den))
+
+
+def fixed_compensation(compensation=COMPENSATION):
+    """Convert {"zone": {"m", "b"}} floats to integer (m * M_SCALE, b in cC)"""
+    return {zone: (round(c["m"] * M_SCALE), round(c["b"] * 100))
+            for zone, c in compensation.items()}
+
+
+FIXED_COMPENSATION = fixed_compensation()
+
+
+def raw_to_centi(raw):
+    """centi-Kelvin uint16 -> centi-Celsius int32 (scalar or array)"""
+    if isinstance(raw, np.ndarray):
+        return raw.astype(np.int32) - KELVIN_OFFSET
+    return int(raw) - KELVIN_OFFSET
+
+
+def celsius_to_raw(celsius):
+    """Threshold in Celsius -> raw centi-Kelvin, for comparing against frames"""
+    return int(round(celsius * 100)) + KELVIN_OFFSET
+
+
+def centi_to_celsius(centi):
+    """Only for output: display strings and PLC float encoding"""
+    return centi / 100
+
+
+def apply_zone_centi(centi, zone, compensation=FIXED_COMPENSATION):
+    """Integer version of apply_zone: ((t - b) / m) - 9"""
+    m, b = compensation[zone]
+    return _round_div((centi - b) * M_SCALE, m) - ZONE_OFFSET_CC
+
+
+def roi_extremes_centi(frame, x0, y0, x1, y1):
+    """(min, max) of raw[y0:y1, x0:x1] in centi-Celsius"""
+    lo, hi, _, _ = cv.minMaxLoc(frame[y0:y1, x0:x1])
+    return int(lo) - KELVIN_OFFSET, int(hi) - KELVIN_OFFSET
+
+
+class IntegerSmoother:
+    """Moving average over the last `size` integer samples, exact and drift-free"""
+
+    def __init__(self, size=5):
+        self.values = np.zeros(size, dtype=np.int32)
+        self.size = size
+        self.count = 0
+        self.index = 0
+        self.total = 0
+
+    def append(self, value):
+        if self.count == self.size:
+            self.total -= int(self.values[self.index])
+        else:
+            self.count += 1
+        self.values[self.index] = value
+        self.total += value
+        self.index = (self.index + 1) % self.size
+        return _round_div(self.total, self.count)
+
+    def clear(self):
+        self.count = self.index = self.total = 0
+
+
+class FixedPointMeter:
+    """Per-point compensated and smoothed readings in centi-Celsius"""
+
+    def __init__(self, names, size=5, compensation=FIXED_COMPENSATION):
+        self.compensation = compensation
+        self.smoothers = {name: IntegerSmoother(size) for name in names}
+
+    def update(self, name, raw, zone):
+        """Feed one raw pixel value, return the smoothed value in centi-Celsius"""
+        centi = apply_zone_centi(raw_to_centi(raw), zone, self.compensation)
+        return self.smoothers[name].append(centi)
+
+    def clear(self):
+        for smoother in self.smoothers.values():
+            smoother.clear()
@@ -0,0 +1,196 @@
+import argparse
+import os
+import selectors
+import socket
+import struct
+import time
+from multiprocessing import shared_memory
+
+from framering import SharedFrameRing
+from lepton import open_lepton
+
+SOCKET_PATH = "/tmp/thermal_broker.sock"
+SHM_NAME = "thermal_broker"
+RING_SLOTS = 16
+_SEQ = struct.Struct("<q")
+
+
+class FrameBroker:
+    """Owns the camera and publishes frames to local subscribers.
+
+    Frames go into a SharedFrameRing; every subscriber gets the sequence
+    number of each new frame over a non-blocking Unix SOCK_SEQPACKET
+    connection. A subscriber whose socket buffer is full simply misses that
+    notification, the camera loop never waits for anyone.
+    """
+
+    def __init__(self, socket_path=SOCKET_PATH, shm_name=SHM_NAME, slots=RING_SLOTS):
+        self.socket_path = socket_path
+        self.ring = self._create_ring(shm_name, slots)
+        self.cap = open_lepton()
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self.listener.bind(socket_path)
+        self.listener.listen()
+        self.listener.setblocking(False)
+
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.subscribers = set()
+        self.dropped = 0
+
+    @staticmethod
+    def _create_ring(name, slots):
+        try:
+            return SharedFrameRing(name, slots=slots, create=True)
+        except FileExistsError:
+            # Left behind by a broker that was killed
+            shared_memory.SharedMemory(name=name).unlink()
+            return SharedFrameRing(name, slots=slots, create=True)
+
+    def _accept(self):
+        conn, _ = self.listener.accept()
+        conn.setblocking(False)
+        conn.send(self.ring.name.encode())
+        self.selector.register(conn, selectors.EVENT_READ)
+        self.subscribers.add(conn)
+        print(f"Subscriber connected ({len(self.subscribers)} total)")
+
+    def _drop(self, conn):
+        self.selector.unregister(conn)
+        self.subscribers.discard(conn)
+        conn.close()
+        print(f"Subscriber left ({len(self.subscribers)} total)")
+
+    def _poll(self):
+        for key, _ in self.selector.select(timeout=0):
+            if key.fileobj is self.listener:
+                self._accept()
+            else:
+                # Subscribers never talk, readable means closed
+                try:
+                    data = key.fileobj.recv(16)
+                except OSError:
+                    data = b""
+                if not data:
+                    self._drop(key.fileobj)
+
+    def publish(self, frame):
+        seq = self.ring.write(frame)
+        msg = _SEQ.pack(seq)
+        for conn in list(self.subscribers):
+            try:
+                conn.send(msg)
+            except BlockingIOError:
+                self.dropped += 1
+            except OSError:
+                self._drop(conn)
+        return seq
+
+    def run(self):
+        print(f"Frame broker listening on {self.socket_path}")
+        try:
+            while True:
+                self._poll()
+                ret, frame = self.cap.read()
+                if not ret:
+                    print("No frame received")
+                    time.sleep(0.1)
+                    continue
+                self.publish(frame)
+        finally:
+            self.close()
+
+    def close(self):
+        for conn in list(self.subscribers):
+            self._drop(conn)
+        self.listener.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.cap.release()
+        self.ring.close()
+
+
+class BrokerCapture:
+    """cv.VideoCapture-like subscriber to a running FrameBroker"""
+
+    def __init__(self, socket_path=SOCKET_PATH, timeout=1.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self.sock.connect(socket_path)
+        self.timeout = timeout
+        self.sock.settimeout(timeout)
+        self.ring = SharedFrameRing(self.sock.recv(256).decode())
+        self.last_seq = 0
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def isOpened(self):
+        return self.ring is not None
+
+    def _newest_seq(self):
+        # Block for one notification, then skip to the newest queued one
+        msg = self.sock.recv(_SEQ.size)
+        if not msg:
+            return None
+        seq = _SEQ.unpack(msg)[0]
+        self.sock.setblocking(False)
+        try:
+            while True:
+                msg = self.sock.recv(_SEQ.size)
+                if not msg:
+                    break
+                seq = _SEQ.unpack(msg)[0]
+        except BlockingIOError:
+            pass
+        finally:
+            self.sock.settimeout(self.timeout)
+        return seq
+
+    def read(self):
+        try:
+            seq = self._newest_seq()
+        except (socket.timeout, OSError):
+            return False, None
+        if seq is None:
+            return False, None
+        frame = self.ring.read(seq)
+        if frame is None:
+            # Overwritten already, the newest frame is just as good
+            seq, frame = self.ring.read_latest()
+            if frame is None:
+                return False, None
+        self.last_seq = seq
+        return True, frame
+
+    def release(self):
+        if self.ring is not None:
+            self.sock.close()
+            self.ring.close()
+            self.ring = None
+
+
+def open_frame_source(socket_path=SOCKET_PATH):
+    """Subscribe to the broker if one is running, otherwise open the camera"""
+    if os.path.exists(socket_path):
+        try:
+            return BrokerCapture(socket_path)
+        except OSError as e:
+            print(f"Frame broker not reachable ({e}), opening camera directly")
+    return open_lepton()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lepton frame broker")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    args = parser.parse_args()
+    try:
+        FrameBroker(args.socket).run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+from functools import cached_property
+
+import cv2 as cv
+import numpy as np
+
+from fixedpoint import centi_to_celsius, roi_extremes_centi
+from lepton import KELVIN_OFFSET
+
+HIST_SHIFT = 3  # 8 raw counts (0.08 C) per histogram bin, also autorange.py's
+
+
+class FrameContext:
+    """Derived products of one raw Y16 frame, computed on first use.
+
+    Every consumer of a frame asks the context instead of recomputing, so
+    each product is built at most once per frame.
+    """
+
+    def __init__(self, raw, seq, minraw=26315, maxraw=42315, colormap=cv.COLORMAP_JET):
+        self.raw = raw
+        self.seq = seq
+        self.minraw = minraw
+        self.maxraw = maxraw
+        self.colormap = colormap
+        self._roi_stats = {}
+
+    @cached_property
+    def celsius(self):
+        """float32 temperature frame in Celsius"""
+        out = self.raw.astype(np.float32)
+        out -= KELVIN_OFFSET
+        out *= 0.01
+        return out
+
+    @cached_property
+    def frame_8(self):
+        """8-bit frame normalized to [minraw, maxraw]"""
+        clipped = np.clip(self.raw, self.minraw, self.maxraw)
+        return ((clipped - self.minraw) / (self.maxraw - self.minraw) * 255).astype(np.uint8)
+
+    @cached_property
+    def colorized(self):
+        return cv.applyColorMap(self.frame_8, self.colormap)
+
+    @cached_property
+    def extremes(self):
+        """Global min/max of the frame, raw and Celsius, plus their locations"""
+        min_raw, max_raw, min_loc, max_loc = cv.minMaxLoc(self.raw)
+        return {
+            "min_raw": int(min_raw),
+            "max_raw": int(max_raw),
+            "min_celsius": (min_raw - KELVIN_OFFSET) / 100,
+            "max_celsius": (max_raw - KELVIN_OFFSET) / 100,
+            "min_loc": min_loc,
+            "max_loc": max_loc,
+        }
+
+    @cached_property
+    def histogram(self):
+        """Counts of raw values in bins of 2**HIST_SHIFT"""
+        return np.bincount((self.raw >> HIST_SHIFT).ravel(), minlength=65536 >> HIST_SHIFT)
+
+    def roi_stats(self, x0, y0, x1, y1):
+        """Celsius statistics of raw[y0:y1, x0:x1], memoized per rectangle.
+
+        Computed on the raw uint16 region, extremes as integer
+        centi-degrees; converted to Celsius only in the result.
+        """
+        key = (x0, y0, x1, y1)
+        stats = self._roi_stats.get(key)
+        if stats is None:
+            region = self.raw[y0:y1, x0:x1]
+            mean, std = cv.meanStdDev(region)
+            lo, hi = roi_extremes_centi(self.raw, x0, y0, x1, y1)
+            stats = {
+                "mean": centi_to_celsius(float(mean[0, 0]) - KELVIN_OFFSET),
+                "min": centi_to_celsius(lo),
+                "max": centi_to_celsius(hi),
+                "std": centi_to_celsius(float(std[0, 0])),
+                "pixels": region.size,
+            }
+            self._roi_stats[key] = stats
+        return stats
+
+
+class FrameContextCache:
+    """Hands out the FrameContext of the current frame, keyed by sequence number.
+
+    Asking for a new sequence number drops the previous context and all of
+    its products.
+    """
+
+    def __init__(self, **display):
+        self.display = display
+        self.current = None
+
+    def get(self, raw, seq):
+        if self.current is None or self.current.seq != seq:
+            self.current = FrameContext(raw, seq, **self.display)
+        return self.current
@@ -0,0 +1,100 @@
+import sys
+from threading import Lock
+
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+from lepton import FRAME_SHAPE
+
+# Header layout (int64): slots, height, width, latest seq, then one seq per slot
+_META = 4
+_attach_lock = Lock()
+
+
+class SharedFrameRing:
+    """Ring of raw Y16 frames living in a multiprocessing shared memory block.
+
+    One process writes, any number of processes read by sequence number.
+    Every slot carries the sequence number of the frame it holds, so a
+    reader that lost the race against the writer gets None instead of a
+    torn frame.
+    """
+
+    def __init__(self, name=None, slots=8, shape=FRAME_SHAPE, create=False):
+        if create:
+            h, w = shape
+            size = (_META + slots) * 8 + slots * h * w * 2
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            header = np.ndarray((_META,), dtype=np.int64, buffer=self.shm.buf)
+            header[:] = (slots, h, w, 0)
+        else:
+            self.shm = self._attach(name)
+            header = np.ndarray((_META,), dtype=np.int64, buffer=self.shm.buf)
+            slots, h, w = (int(v) for v in header[:3])
+
+        self.owner = create
+        self.name = self.shm.name
+        self.slots = slots
+        self.shape = (h, w)
+        self.header = np.ndarray((_META + slots,), dtype=np.int64, buffer=self.shm.buf)
+        self.slot_seq = self.header[_META:]
+        if create:
+            self.slot_seq[:] = -1
+        self.frames = np.ndarray((slots, h, w), dtype=np.uint16,
+                                 buffer=self.shm.buf, offset=(_META + slots) * 8)
+
+    @staticmethod
+    def _attach(name):
+        # Readers must not unlink the block when they exit, only the owner does
+        if sys.version_info >= (3, 13):
+            return shared_memory.SharedMemory(name=name, track=False)
+        # Before 3.13 attaching registers the block with the resource
+        # tracker. Unregistering it afterwards is wrong in a forked or
+        # spawned child, which shares the owner's tracker: it drops the
+        # owner's entry. So readers attach without registering at all.
+        with _attach_lock:
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                return shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+
+    @property
+    def latest(self):
+        return int(self.header[3])
+
+    def write(self, frame):
+        """Copy a frame into the next slot and return its sequence number"""
+        seq = self.latest + 1
+        slot = seq % self.slots
+        self.slot_seq[slot] = -1  # mark as being written
+        self.frames[slot] = frame
+        self.slot_seq[slot] = seq
+        self.header[3] = seq
+        return seq
+
+    def read(self, seq, out=None):
+        """Copy frame `seq` out of the ring, None if it was already overwritten"""
+        slot = seq % self.slots
+        if self.slot_seq[slot] != seq:
+            return None
+        if out is None:
+            out = np.empty(self.shape, dtype=np.uint16)
+        out[:] = self.frames[slot]
+        if self.slot_seq[slot] != seq:
+            return None
+        return out
+
+    def read_latest(self, out=None):
+        seq = self.latest
+        if seq == 0:
+            return 0, None
+        return seq, self.read(seq, out)
+
+    def close(self):
+        # Drop numpy views before closing the mapping
+        self.header = self.slot_seq = self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -1,17 +1,36 @@
 import sys
 import os
+import math
 from PySide6.QtCore import Qt, QTimer, QRegularExpression
 from PySide6.QtWidgets import (QApplication, QWidget, QLabel, QVBoxLayout, 
                                QHBoxLayout, QFrame, QPushButton, QLineEdit,
-                               QMessageBox)
-from PySide6.QtGui import QFontDatabase, QFont, QPainter, QColor, QRegularExpressionValidator, QImage, QPixmap
+                               QMessageBox, QComboBox)
+from PySide6.QtGui import QFontDatabase, QFont, QPainter, QColor, QRegularExpressionValidator
 
 import cv2 as cv
 import numpy as np
-from collections import deque
-from queue import Queue, Full, Empty
 from SendtempTCP import ModbusClient
 import time
+from framebroker import open_frame_source
+from pipeline import Pipeline
+from fixedpoint import FixedPointMeter, centi_to_celsius, fixed_compensation
+from autorange import AutoRange
+from thermaldisplay import DisplayEngine, PALETTES
+from overlay import TextSpriteCache, zone_overlay
+from videowidget import ThermalVideoWidget
+from qtcapture import frame_signals
+from regcodec import RegisterCodec, register_runs
+from calibrated import CalibratedFrame
+from framecontext import FrameContextCache
+from spotmeter import SpotMeter, parse_spot
+from hotspots import HotspotTracker
+from alarms import AlarmEngine
+from prerecord import PreTriggerRecorder
+from historian import Historian
+from baseline import BaselineModel
+from changegate import ChangeGate
+from scheduler import PublishScheduler
+from plcio import PlcInterface, McWords
 
 from pymcprotocol import Type3E
 import socket
@@ -32,18 +51,45 @@ red = '#d9534f'
 
 minraw = 26315  # --> -10 Celsius
 maxraw = 42315  # --> 150 Celsius
-BUF_SIZE = 2
+AUTO_RANGE = True   # display limits follow the scene (autorange.py)
+SPOT = "3x3"        # point spot size: "1", "3x3", "5x5" or "r<radius>" (spotmeter.py)
+HOTSPOTS = 0        # tracked automatic hotspots, opt-in: published from D103 (hotspots.py)
+# Alarm rules for every point and hotspot (alarms.py), C and C/min, None to disable, e.g.
+# {"hi": 80.0, "hihi": 100.0, "rate": 10.0, "hysteresis": 2.0, "min_duration": 2.0}
+ALARM_LIMITS = None
+ALARM_REGISTER = 106  # D register of the packed alarm words, after D103-D105 for 3 hotspots
+PRERECORD_SECONDS = 60  # raw frames kept for alarm clips, 0 to disable (prerecord.py)
+HISTORY_DB = "history.db"  # every frame's readings, None to disable (historian.py)
+BASELINE_MODEL = "baseline.npz"  # learned normal per machine state, None to disable (baseline.py)
+PLC_IO = False   # poll the PLC trigger/state words and answer measure-now requests (plcio.py)
+MAX_STALE = 1.0  # static scenes are processed at least this often (s), None to process every frame
+# Publish rates in seconds (scheduler.py)
+TEMP_INTERVAL = 1.0
+ALARM_INTERVAL = 0.1
+STATS_INTERVAL = 60.0
 
 class TempGUI(QWidget):
-    def __init__(self):
+    def __init__(self, capture=None):
         super().__init__()
+        self.capture = capture
         self.setup_fonts()
         self.setup_window()
         self.create_interface()
 
-        self.plc_timer = QTimer()
-        self.plc_timer.timeout.connect(self.send_to_plc_auto)
-        self.plc_timer.start(1000)  
+        # PLC publishing on monotonic deadlines; one precise single-shot
+        # timer is re-armed for whichever job is due next
+        self.sent_alarm_words = None
+        self.mc_codec = RegisterCodec("int16", scale=100)
+        self.scheduler = PublishScheduler()
+        self.scheduler.add("temps", TEMP_INTERVAL, self.send_to_plc_auto)
+        if ALARM_LIMITS:
+            self.scheduler.add("alarms", ALARM_INTERVAL, self.send_alarms_auto)
+        self.scheduler.add("stats", STATS_INTERVAL, self.report_publish_stats, STATS_INTERVAL)
+        self.plc_timer = QTimer(self)
+        self.plc_timer.setSingleShot(True)
+        self.plc_timer.setTimerType(Qt.PreciseTimer)
+        self.plc_timer.timeout.connect(self.run_publish_jobs)
+        self.plc_timer.start(0)
 
 
     def setup_fonts(self):
@@ -377,7 +423,12 @@ class TempGUI(QWidget):
         return panel
 
     def right_panel(self):
-        return ThermalCameraPanel()
+        return ThermalCameraPanel(self.capture)
+
+    def closeEvent(self, event):
+        self.stop_plc_io()
+        self.right_panel_widget.stop_capture()
+        super().closeEvent(event)
 
     def auto_insert_dot(self, text: str):
         if len(text) < getattr(self, "_last_len", 0):
@@ -404,6 +455,7 @@ class TempGUI(QWidget):
             QMessageBox.warning(self, "Warning", "Port must be a number!")
             return
 
+        self.stop_plc_io()
         if hasattr(self, 'plc_client') and self.plc_client:
             self.plc_client.close()
 
@@ -412,12 +464,29 @@ class TempGUI(QWidget):
         try: 
             self.plc_client.connect(ip, port)
             self.update_plc_status(True)
+            self.plc_words = McWords(self.plc_client)
+            if PLC_IO:
+                self.start_plc_io(self.plc_words)
         except:
             self.update_plc_status(False)
             QMessageBox.warning(self, "Error", "Can not connect PLC")
             self.plc_client = None
 
+    def start_plc_io(self, words):
+        """Trigger/state polling and the measure-now result block (plcio.py)"""
+        panel = self.right_panel_widget
+        self.plc_io = PlcInterface(words, panel.avg_temp_send, on_record=panel.request_clip)
+        self.plc_io.start()
+        panel.plc_io = self.plc_io
+
+    def stop_plc_io(self):
+        if getattr(self, 'plc_io', None):
+            self.right_panel_widget.plc_io = None
+            self.plc_io.stop()
+            self.plc_io = None
+
     def disconnect_from_plc(self):
+        self.stop_plc_io()
         if hasattr(self, 'plc_client') and self.plc_client:
             self.plc_client.close()
             self.plc_client = None
@@ -434,13 +503,56 @@ class TempGUI(QWidget):
             self.status_label.setStyleSheet(f"color: {red};")
         self.status_indicator.update()
 
+    def register_map(self):
+        """D register number per key, typed as "100" or "D100" """
+        reg1 = self.register1_input.text().strip()
+        reg2 = self.register2_input.text().strip()
+        reg3 = self.register3_input.text().strip()
+
+        register_map = {
+            "state1": reg1 if reg1 else "D100",
+            "state2": reg2 if reg2 else "D101",
+            "state3": reg3 if reg3 else "D102",
+            # hotspots.py slots, only when hotspots are tracked
+            **{f"hot{i + 1}": f"D{103 + i}" for i in range(HOTSPOTS)},
+        }
+        return {key: int(reg.upper().lstrip("D")) for key, reg in register_map.items()}
+
+    def run_publish_jobs(self):
+        wait = self.scheduler.run_pending()
+        self.plc_timer.start(math.ceil(wait * 1000))
+
+    def report_publish_stats(self):
+        """Deadline misses per publish job, the scheduler's health metric"""
+        for name, stats in self.scheduler.stats().items():
+            print(f"Publish {name}: {stats['runs']} runs, {stats['misses']} missed, "
+                  f"max late {stats['max_late_ms']} ms")
+        gate = self.right_panel_widget.gate
+        if gate:
+            stats = gate.stats()
+            print(f"Frames: {stats['processed']} processed, {stats['skipped']} static "
+                  f"({stats['skipped_pct']}% skipped)")
+
+    def send_alarms_auto(self):
+        """Alarm words alone, at the faster alarm rate, when they change"""
+        if not getattr(self, 'plc_client', None):
+            return
+        words = self.right_panel_widget.alarms.words()
+        if words == self.sent_alarm_words:
+            return
+        try:
+            self.plc_words.write_words(ALARM_REGISTER, words)
+            self.sent_alarm_words = words
+        except Exception as e:
+            print(f"Error sending alarms: {e}")
+
     def send_to_plc_auto(self):
         if not hasattr(self, 'plc_client') or not self.plc_client:
             return  # not connected
 
         panel = self.right_panel_widget
         data_to_send = {}
-        for key in ["state1", "state2", "state3"]:
+        for key in panel.avg_temp_send:
             if panel.avg_temp_send[key]:
                 data_to_send[key] = panel.avg_temp_send[key][-1]
 
@@ -448,31 +560,21 @@ class TempGUI(QWidget):
             return  # nothing to send yet
         
         try:
-            reg1 = self.register1_input.text().strip()
-            reg2 = self.register2_input.text().strip()
-            reg3 = self.register3_input.text().strip()
-
-            register_map = {
-                "state1": reg1 if reg1 else "D100",
-                "state2": reg2 if reg2 else "D101",
-                "state3": reg3 if reg3 else "D102",
-            }
-
-            values = []
-            regs = []
-            for key in ["state1", "state2", "state3"]:
-                regs.append(register_map[key])
-                if key in data_to_send:
-                    val = data_to_send[key]
-                    float_val = float(f"{val:.2f}")
-                    int_val = int(float_val * 100)
-                    values.append(int_val)
-                else:
-                    values.append(0)
-
-            for reg, val in zip(regs, values):
-                if reg: 
-                    self.plc_client.batchwrite_wordunits(f"D{reg}", [val])
+            register_map = self.register_map()
+            keys = [key for key in data_to_send if key in register_map]
+
+            # Centi-degree words for the keys with a value, in one pass (regcodec.py)
+            values = self.mc_codec.encode([data_to_send[key] for key in keys]).tolist()
+            writes = [(register_map[key], [value]) for key, value in zip(keys, values)]
+            alarm_words = panel.alarms.words() if panel.alarms else []
+            if alarm_words:
+                writes.append((ALARM_REGISTER, alarm_words))
+
+            # One batch write per run of adjacent registers; registers of
+            # keys without a value are not touched
+            for reg, words in register_runs(writes):
+                self.plc_words.write_words(reg, words)
+            self.sent_alarm_words = alarm_words
 
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Error sending data: {e}")
@@ -486,7 +588,7 @@ class TempGUI(QWidget):
 #####################################################################################################################################################
 #RIGHT PANEL
 class ThermalCameraPanel(QFrame):
-    def __init__(self):
+    def __init__(self, capture=None):
         super().__init__()
         self.setStyleSheet(f"""
             QFrame {{
@@ -504,15 +606,14 @@ class ThermalCameraPanel(QFrame):
         self.layout.addWidget(self.title_label)
         self.layout.addSpacing(20)
 
-        self.camera_label = QLabel()
-        self.camera_label.setAlignment(Qt.AlignCenter)
-        self.camera_label.setStyleSheet("border: 1px solid #ccc; border-radius: 10px;")
-        self.layout.addWidget(self.camera_label)
+        # Native frames are scaled to the 720x640 view by Qt when painting
+        self.video = ThermalVideoWidget((720, 640))
+        self.layout.addWidget(self.video, 1)
         self.layout.addStretch()
         self.setLayout(self.layout)
-        
-        self.camera_label.setMouseTracking(True)
-        self.camera_label.mousePressEvent = self.handle_mouse_click
+
+        self.video.clicked.connect(self.handle_mouse_click)
+        self.video.hovered.connect(self.handle_hover)
 
         self.clear_button = QPushButton("Clear Points")
         self.clear_button.setFont(QFont("Poppins", 14, QFont.Weight.Medium))
@@ -533,41 +634,80 @@ class ThermalCameraPanel(QFrame):
                             }}
                             """)
         self.clear_button.clicked.connect(self.clear_points)
-        self.layout.addWidget(self.clear_button, alignment=Qt.AlignCenter | Qt.AlignTop)
+
+        self.palette_box = QComboBox()
+        self.palette_box.addItems([name.capitalize() for name in PALETTES])
+        self.palette_box.setFont(QFont("Poppins", 14, QFont.Weight.Medium))
+        self.palette_box.setFixedHeight(40)
+        self.palette_box.setFixedWidth(150)
+        self.palette_box.setStyleSheet(f"""
+                            QComboBox {{
+                                border: 3px solid #cccccc;
+                                border-radius: 8px;
+                                padding: 6px 10px;
+                                color: {dark_text};
+                            }}
+                            """)
+        self.palette_box.currentIndexChanged.connect(self.change_palette)
+
+        controls_layout = QHBoxLayout()
+        controls_layout.addStretch()
+        controls_layout.addWidget(self.clear_button)
+        controls_layout.addSpacing(40)
+        controls_layout.addWidget(self.palette_box)
+        controls_layout.addStretch()
+        self.layout.addLayout(controls_layout)
 
         # --- Thermal camera setup ---
-        self.cap = cv.VideoCapture(0, cv.CAP_V4L2)
-        self.cap.set(cv.CAP_PROP_FOURCC, cv.VideoWriter_fourcc('Y','1','6',' '))
-        self.cap.set(cv.CAP_PROP_FRAME_WIDTH, 160)
-        self.cap.set(cv.CAP_PROP_FRAME_HEIGHT, 120)
-        self.cap.set(cv.CAP_PROP_FPS, 9)
-        self.cap.set(cv.CAP_PROP_CONVERT_RGB, 0)
+        # capture is a frame source shared with other processes (pipeline.py),
+        # otherwise subscribe to framebroker.py or open the camera directly
+        self.cap = capture if capture is not None else open_frame_source()
 
         self.p1 = self.p2 = self.p3 = None
-        self.buffers = {
-            "state1": deque(maxlen=5),
-            "state2": deque(maxlen=5),
-            "state3": deque(maxlen=5),
-        }
         self.avg_temp_send = {"state1": [], "state2": [], "state3": []}
+        self.display = DisplayEngine("jet", minraw, maxraw)
+        self.auto_range = AutoRange(self.display, minraw=minraw, maxraw=maxraw)
+        self.zones = None
+        self.text_sprites = TextSpriteCache(cv.FONT_HERSHEY_DUPLEX, 0.8, 2)
+        self.label_positions = {}
+        # Hover readout: calibrated frame refreshed per frame only while hovering
+        self.calibrated = CalibratedFrame()
+        # Per-frame products (histogram, Celsius frame) shared by their consumers
+        self.contexts = FrameContextCache()
+        self.spots = SpotMeter()
+        self.spot = parse_spot(SPOT)
+        self.hotspots = HotspotTracker(HOTSPOTS) if HOTSPOTS else None
+        if self.hotspots:
+            self.avg_temp_send.update({name: [] for name in self.hotspots.names})
+        self.alarms = AlarmEngine(self.avg_temp_send, **ALARM_LIMITS) if ALARM_LIMITS else None
+        self.recorder = PreTriggerRecorder(PRERECORD_SECONDS) if PRERECORD_SECONDS else None
+        self.clip_request = None
+        self.history = Historian(HISTORY_DB) if HISTORY_DB else None
+        self.baseline = BaselineModel.load(BASELINE_MODEL) if BASELINE_MODEL else None
+        self.gate = ChangeGate(max_stale=MAX_STALE) if MAX_STALE else None
+        self.readings = {}        # last processed frame's values, re-used on skipped frames
+        self.plc_io = None        # plcio.PlcInterface while the PLC is connected
+        self.machine_state = 0    # sampled from the PLC alongside every frame
+        self.frame_seq = 0
+        self.hover = None
         self.compensation = {
             "left": {"m": 0.752, "b": 5.093},
             "middle": {"m": 0.728, "b": 5.142},
             "right": {"m": 0.704, "b": 5.190},
         }
+        self.meter = FixedPointMeter(["state1", "state2", "state3"],
+                                     compensation=fixed_compensation(self.compensation))
 
         self.plc_client = ModbusClient("192.168.3.40")
 
-        self.frame_queue = Queue(BUF_SIZE)
         self.last_send_time = time.time()
 
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(110)  # ~9 FPS
-
-    def apply_zone(self, temp_celsius, zone):
-        comp = self.compensation[zone]
-        return ((temp_celsius - comp["b"]) / comp["m"]) - 9
+        # Woken by the capture itself once per frame, no polling timer
+        self.frames = frame_signals(self.cap, self)
+        self.frames.frame_ready.connect(self.update_frame)
+        self.frames.failed.connect(self.camera_failed)
+        self.frames.start()
+        QApplication.instance().aboutToQuit.connect(self.stop_capture)
 
     def text_position(self, x, y, text, frame_width, frame_height):
         text_width = len(text) * 12
@@ -588,120 +728,207 @@ class ThermalCameraPanel(QFrame):
             text_y = max(margin, frame_height - text_height - margin)
         return int(text_x), int(text_y)
 
-    def handle_mouse_click(self, event):
-        if self.camera_label.pixmap() is None:
+    def label_position(self, point, text, frame_width, frame_height):
+        """text_position, laid out once per point and label"""
+        key = (point, text, frame_width, frame_height)
+        pos = self.label_positions.get(key)
+        if pos is None:
+            pos = self.text_position(point[0], point[1], text, frame_width, frame_height)
+            self.label_positions[key] = pos
+        return pos
+
+    def handle_mouse_click(self, x, y, button):
+        if not self.video.has_frame():
             return
 
         if all([self.p1, self.p2, self.p3]):
             print("Maximum of 3 points reached. Press Clear to reset.")
             return
 
-        mapped = self.map_label_click_to_image_coords(event)
-        if mapped is None:
-            return
-
-        x, y = mapped
-
-        if event.button() == Qt.LeftButton:
+        if button == Qt.LeftButton:
             if self.p1 is None:
                 self.p1 = (x, y)
             elif self.p2 is None:
                 self.p2 = (x, y)
             elif self.p3 is None:
                 self.p3 = (x, y)
+            self.invalidate_frame()
 
-    def map_label_click_to_image_coords(self, event):
-        pm = self.camera_label.pixmap()
-        if pm is None:
-            return None
-
-        click_x = int(event.position().x())
-        click_y = int(event.position().y())
-
-        label_w = self.camera_label.width()
-        label_h = self.camera_label.height()
-        pixmap_w = pm.width()
-        pixmap_h = pm.height()
-
-        scale = min(label_w / pixmap_w, label_h / pixmap_h)
-        disp_w = int(pixmap_w * scale)
-        disp_h = int(pixmap_h * scale)
-
-        offset_x = (label_w - disp_w) // 2
-        offset_y = (label_h - disp_h) // 2
-
-        if not (offset_x <= click_x <= offset_x + disp_w and offset_y <= click_y <= offset_y + disp_h):
-            return None
-
-        img_x = int((click_x - offset_x) * (pixmap_w / disp_w))
-        img_y = int((click_y - offset_y) * (pixmap_h / disp_h))
-
-        return max(0, min(img_x, pixmap_w-1)), max(0, min(img_y, pixmap_h-1))
+    def handle_hover(self, x, y):
+        if x < 0:
+            self.hover = None
+            self.calibrated.invalidate()
+        else:
+            if self.hover is None:
+                self.invalidate_frame()  # the calibrated frame is only kept while hovering
+            self.hover = (x, y)
+        self.show_hover()
+
+    def show_hover(self):
+        """O(1) lookup in the cached calibrated frame, no recomputation"""
+        reading = None
+        if self.hover is not None and self.calibrated.valid:
+            native_h, native_w = self.calibrated.celsius.shape
+            width, height = self.video.logical_size
+            x, y = self.hover
+            reading = self.calibrated.at(x * native_w // width, y * native_h // height)
+        if reading is None:
+            self.video.set_readout(None)
+        else:
+            temp, local_max = reading
+            self.video.set_readout(f"{temp:.1f}C   max {local_max:.1f}C")
+
+    def request_clip(self, reason):
+        """Called from the PLC polling thread, handled on the next frame"""
+        self.clip_request = reason
+
+    def check_alarms(self, readings):
+        """Every rule of every channel in one vectorized pass, at this frame's time"""
+        self.alarms.update([readings.get(name, np.nan) for name in self.alarms.names],
+                           time.monotonic())
+        for name, kind, on in self.alarms.transitions():
+            print(f"Alarm {kind} {name}: {'ON' if on else 'cleared'}")
+            if on and self.recorder:
+                self.recorder.trigger(f"{kind}_{name}")
+
+    def check_baseline(self, ctx, points_data, overlay):
+        """Learn the machine state's baseline, or flag points that left it"""
+        if self.baseline.update(ctx, self.machine_state):
+            self.baseline.checkpoint(BASELINE_MODEL)
+            return
+        native_h, native_w = ctx.raw.shape[:2]
+        width, height = self.video.logical_size
+        rois = {}
+        for name, point, _ in points_data:
+            if point is not None:
+                x, y = point[0] * native_w // width, point[1] * native_h // height
+                rois[name] = (x - 2, y - 2, x + 3, y + 3)
+        z = self.baseline.score(ctx, self.machine_state)
+        flagged = [name for name, score in self.baseline.roi_scores(z, rois).items()
+                   if abs(score) > self.baseline.z_threshold]
+        if flagged:
+            self.zones.mark(self.text_sprites.put_text(
+                overlay, "ANOMALY " + " ".join(flagged), (20, 100), (240, 173, 78, 255)))
 
     def clear_points(self):
         self.p1 = self.p2 = self.p3 = None
-        for key in self.buffers:
-            self.buffers[key].clear()
+        self.meter.clear()
+        if self.hotspots:
+            self.hotspots.clear()
         for key in self.avg_temp_send:
             self.avg_temp_send[key].clear()
+        self.label_positions.clear()
+        self.invalidate_frame()
 
-    def update_frame(self):
-        if self.cap is None:
-            return
+    def change_palette(self, index):
+        self.display.set_palette(PALETTES[index])
+        self.invalidate_frame()
 
-        ret, frame = self.cap.read()
-        if not ret:
-            self.timer.stop()
+    def invalidate_frame(self):
+        """Re-render and re-measure the next frame even if the scene is static"""
+        if self.gate:
+            self.gate.invalidate()
 
-            # Release camera
+    def stop_capture(self):
+        if self.cap is None:
+            return
+        if self.frames.stop():
             self.cap.release()
-            self.cap = None
-
-            # Show error popup
-            msg = QMessageBox(self)
-            msg.setIcon(QMessageBox.Critical)
-            msg.setWindowTitle("Camera Error")
-            msg.setText("Camera stream stopped. Please reconnect the camera.")
-            msg.setStandardButtons(QMessageBox.Ok)
-            msg.exec()
-            return 
-        try:
-            if self.frame_queue.full():
-                self.frame_queue.get_nowait()
-            self.frame_queue.put_nowait(frame)
-        except Full:
-            pass
+        # else the capture thread releases it once its read() returns
+        self.cap = None
+        if self.recorder:
+            self.recorder.close()
+        if self.history:
+            self.history.close()
+        if self.baseline:
+            self.baseline.save(BASELINE_MODEL)
+
+    def camera_failed(self):
+        # Release camera
+        self.stop_capture()
+
+        # Show error popup
+        msg = QMessageBox(self)
+        msg.setIcon(QMessageBox.Critical)
+        msg.setWindowTitle("Camera Error")
+        msg.setText("Camera stream stopped. Please reconnect the camera.")
+        msg.setStandardButtons(QMessageBox.Ok)
+        msg.exec()
 
-        try:
-            frame = self.frame_queue.get_nowait()
-        except Empty:
+    def update_frame(self):
+        if self.cap is None:
+            return
+
+        # Newest frame only, if several arrived while we were busy
+        frame = self.frames.take()
+        if frame is None:
             return
 
+        self.frame_seq += 1
+        if self.recorder:
+            self.recorder.push(frame)
+            if self.clip_request:
+                self.recorder.trigger(self.clip_request)
+                self.clip_request = None
+
+        native = frame
         frame = cv.rotate(frame, cv.ROTATE_90_CLOCKWISE)
-        frame = cv.resize(frame, (720, 640), interpolation=cv.INTER_CUBIC)
-        height, width = frame.shape[:2]
+        ctx = self.contexts.get(frame, self.frame_seq)
+        if AUTO_RANGE and frame.dtype == np.uint16:
+            # Limits follow every frame, static ones included
+            self.auto_range.update(ctx)
+
+        if self.gate:
+            if self.plc_io and self.plc_io.armed:
+                # A PLC measure-now is answered with this frame's own values
+                self.gate.invalidate()
+            if not self.gate.changed(native):
+                # Static scene: keep the picture and the cached values, which
+                # stay published and go to the history for this frame too
+                if self.plc_io:
+                    self.machine_state = self.plc_io.machine_state
+                if self.alarms:
+                    # Durations and rates of rise run on the clock, not on frames
+                    self.check_alarms(self.readings)
+                if self.history:
+                    self.history.record(self.readings)
+                return
+
+        native_h, native_w = frame.shape[:2]
+        width, height = self.video.logical_size
 
         if frame.dtype == np.uint16:
-            clipped = np.clip(frame, minraw, maxraw)
-            frame_8 = ((clipped - minraw) / (maxraw - minraw) * 255).astype(np.uint8)
-            thermal_frame = cv.applyColorMap(frame_8, cv.COLORMAP_JET)
+            # Palette, range and isotherms are all baked into the display LUT;
+            # the native frame goes to Qt as is and is scaled when painted
+            self.video.set_bgr(self.display.colorize(frame))
+
+            if self.hover is not None:
+                self.calibrated.update(frame)
+                self.show_hover()
 
-            third = width // 3
-            cv.line(thermal_frame, (third,0),(third,height),(255,255,255),1)
-            cv.line(thermal_frame,(2*third,0),(2*third,height),(255,255,255),1)
-            cv.putText(thermal_frame,"LEFT",(third//2-40,30),cv.FONT_HERSHEY_PLAIN,2,(255,255,255),2)
-            cv.putText(thermal_frame,"MIDDLE",(third+third//2-40,30),cv.FONT_HERSHEY_PLAIN,2,(255,255,255),2)
-            cv.putText(thermal_frame,"RIGHT",(2*third+third//2-40,30),cv.FONT_HERSHEY_PLAIN,2,(255,255,255),2)
+            # Zone lines and titles are rendered once, labels go on top
+            if self.zones is None:
+                self.zones = zone_overlay(width, height)
+            overlay = self.zones.begin()
 
             points_data = [("state1", self.p1, "state1"),
                         ("state2", self.p2, "state2"),
                         ("state3", self.p3, "state3")]
 
+            # One integral image per frame, then every spot mean is O(1)
+            active = [point for _, point, _ in points_data if point is not None]
+            if active:
+                self.spots.update(frame)
+                means, _ = self.spots.measure([x * native_w // width for x, _ in active],
+                                              [y * native_h // height for _, y in active],
+                                              self.spot)
+                spot_raw = dict(zip(active, np.rint(means).astype(np.int64)))
+
+            readings = {}
             for point_name, point, buffer_key in points_data:
                 if point is not None:
                     x, y = point
-                    temp_raw = frame[y, x]
-                    temp_celsius = (temp_raw / 100) - 273.15
+                    temp_raw = spot_raw[point]
 
                     if x < width // 3:
                         zone = "left"
@@ -710,26 +937,51 @@ class ThermalCameraPanel(QFrame):
                     else:
                         zone = "right"
 
-                    cal_temp = self.apply_zone(temp_celsius, zone)
-
-                    self.buffers[buffer_key].append(cal_temp)
-                    avg_temp = sum(self.buffers[buffer_key]) / len(self.buffers[buffer_key])
+                    avg_centi = self.meter.update(buffer_key, temp_raw, zone)
+                    avg_temp = centi_to_celsius(avg_centi)
                     self.avg_temp_send[buffer_key].append(round(avg_temp, 1))
+                    readings[buffer_key] = avg_temp
 
                     text1 = f"{point_name}"       
                     text2 = f"{avg_temp:.2f}C"
-                    x_text, y_text = self.text_position(x, y, text1, width, height)
-                    cv.putText(thermal_frame, text1, (x_text, y_text),
-                            cv.FONT_HERSHEY_DUPLEX, 0.8, (255, 255, 255), 2)
-                    cv.putText(thermal_frame, text2, (x_text, y_text + 30),
-                            cv.FONT_HERSHEY_DUPLEX, 0.8, (255, 255, 255), 2)
-                    cv.circle(thermal_frame, (x, y), 5, (0, 0, 0), -1)
+                    x_text, y_text = self.label_position(point, text1, width, height)
+                    white = (255, 255, 255, 255)
+                    self.zones.mark(self.text_sprites.put_text(overlay, text1, (x_text, y_text), white))
+                    self.zones.mark(self.text_sprites.put_text(overlay, text2, (x_text, y_text + 30), white))
+                    cv.circle(overlay, (x, y), 5, (0, 0, 0, 255), -1)
+                    self.zones.mark((max(y - 6, 0), y + 7, max(x - 6, 0), x + 7))
+
+            if self.hotspots:
+                # Tracked hotspots are published like points: hot1..hotK
+                for name, spot in self.hotspots.update(frame).items():
+                    self.avg_temp_send[name].append(spot["temp"])
+                    readings[name] = spot["temp"]
+                    x = int(spot["x"] * width / native_w)
+                    y = int(spot["y"] * height / native_h)
+                    cv.drawMarker(overlay, (x, y), (255, 255, 255, 255), cv.MARKER_CROSS, 16, 2)
+                    self.zones.mark((max(y - 9, 0), y + 10, max(x - 9, 0), x + 10))
+                    self.zones.mark(self.text_sprites.put_text(
+                        overlay, f"{name} {spot['temp']:.1f}C", (x + 12, max(y - 12, 20)), (255, 255, 255, 255)))
+                for name in self.hotspots.vacant():
+                    # Dropped: the PLC gets NaN, not the last temperature
+                    self.avg_temp_send[name].append(math.nan)
 
-            thermal_frame_rgb = cv.cvtColor(thermal_frame, cv.COLOR_BGR2RGB)
-            h,w,ch = thermal_frame_rgb.shape
-            bytes_per_line = ch * w
-            qt_image = QImage(thermal_frame_rgb.data,w,h,bytes_per_line,QImage.Format_RGB888)
-            self.camera_label.setPixmap(QPixmap.fromImage(qt_image))
+            if self.alarms:
+                self.check_alarms(readings)
+            if self.plc_io:
+                # A PLC "measure now" latches exactly this frame's values
+                self.machine_state = self.plc_io.on_frame(self.frame_seq, readings)
+            if self.history:
+                self.history.record(readings)
+            self.readings = readings
+            active_alarms = self.alarms.active_alarms() if self.alarms else ()
+            if active_alarms:
+                banner = "ALARM " + " ".join(f"{name}:{kind.upper()}" for name, kind in active_alarms)
+                self.zones.mark(self.text_sprites.put_text(overlay, banner, (20, 70), (217, 83, 79, 255)))
+            if self.baseline:
+                self.check_baseline(ctx, points_data, overlay)
+
+            self.video.set_overlay(overlay)
 
 
 
@@ -753,9 +1005,17 @@ class StatusIndicator(QWidget):
         # Pulsing animation
         self.pulse_timer = QTimer()
         self.pulse_timer.timeout.connect(self.update_pulse)
-        self.pulse_timer.start(50) 
         self.pulse_alpha = 1.0
         self.pulse_direction = -0.02
+
+    # Only animate while on screen
+    def showEvent(self, event):
+        self.pulse_timer.start(50)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.pulse_timer.stop()
+        super().hideEvent(event)
     
     def update_pulse(self):
         self.pulse_alpha += self.pulse_direction
@@ -783,13 +1043,29 @@ class StatusIndicator(QWidget):
 
 def main():
     app = QApplication(sys.argv)
+    pipeline = None
+    capture = None
+    if "--multiprocess" in sys.argv:
+        # Only the camera moves to its own process: this one still measures,
+        # alarms and talks to the PLC, the points being set interactively here
+        pipeline = Pipeline(points=None)
+        pipeline.start()
+        capture = pipeline.viewer()
+        watchdog = QTimer()
+        watchdog.timeout.connect(pipeline.watch)
+        watchdog.start(1000)
     try:
-        window = TempGUI()
+        window = TempGUI(capture)
         window.show()
-        sys.exit(app.exec())
+        code = app.exec()
     except Exception as e:
         print(f"Application error: {e}")
-        sys.exit(1)
+        code = 1
+    finally:
+        if pipeline is not None:
+            # The capture was released by the panel (or by its thread)
+            pipeline.shutdown()
+    sys.exit(code)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,396 @@
+import argparse
+import json
+import math
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Condition, Event, Lock, Thread
+
+import cv2 as cv
+import numpy as np
+
+from fixedpoint import FixedPointMeter, centi_to_celsius
+from framecontext import FrameContextCache
+from framebroker import open_frame_source
+from lepton import zone_of, ROTATION
+from pipeline import parse_point
+from spotmeter import SpotMeter, parse_spot, DEFAULT_SPOT
+from hotspots import HotspotTracker
+from alarms import AlarmEngine
+from prerecord import PreTriggerRecorder
+from historian import Historian
+from baseline import BaselineModel
+from changegate import ChangeGate, MAX_STALE
+from plcio import PlcInterface, ModbusWords
+from scheduler import PublishScheduler
+from thermaldisplay import DisplayEngine
+
+# Publish rates in seconds (scheduler.py)
+SEND_INTERVAL = 1.0
+ALARM_INTERVAL = 0.1
+STATS_INTERVAL = 60.0
+JPEG_QUALITY = 80
+VIEW_SCALE = 4       # native 120x160 -> 480x640 for the live view
+REOPEN_AFTER = 20    # failed reads (0.1 s apart) before the source is reopened
+MAX_REOPENS = 5      # reopens without a single frame before giving up
+
+_INDEX = b"""<html><head><title>Thermal Machine Detection</title></head>
+<body style="margin:0;background:#102429">
+<img src="/stream.mjpg" style="height:100vh;display:block;margin:auto">
+</body></html>"""
+
+
+class LiveView:
+    """Latest JPEG and temperatures, shared by all HTTP clients.
+
+    The JPEG is encoded once per frame and only while at least one stream
+    client is connected; every client sends the same bytes.
+    """
+
+    def __init__(self, palette="jet"):
+        self.display = DisplayEngine(palette)
+        self.cond = Condition()
+        self.clients = 0
+        self.jpeg = None
+        self.seq = 0
+        self.lock = Lock()
+        self.publish_stats = {}
+        self.snapshot = {"seq": 0, "time": None, "temps": {}, "hotspots": {}, "alarms": [],
+                         "machine_state": 0}
+
+    def publish(self, seq, rotated, temps, hotspots=None, alarms=(), machine_state=0, anomalies=None):
+        with self.lock:
+            # NaN (a vacant hotspot slot) is not JSON
+            self.snapshot = {"seq": seq, "time": time.time(),
+                             "temps": {name: t for name, t in temps.items() if not math.isnan(t)},
+                             "hotspots": hotspots or {}, "alarms": list(alarms),
+                             "machine_state": machine_state, "anomalies": anomalies}
+        if self.clients == 0:
+            return
+        bgr = self.display.colorize(rotated)
+        bgr = cv.resize(bgr, None, fx=VIEW_SCALE, fy=VIEW_SCALE, interpolation=cv.INTER_LINEAR)
+        ok, jpeg = cv.imencode(".jpg", bgr, [cv.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
+        if ok:
+            with self.cond:
+                self.jpeg = jpeg.tobytes()
+                self.seq = seq
+                self.cond.notify_all()
+
+    def wait_frame(self, last_seq, timeout=2.0):
+        with self.cond:
+            self.cond.wait_for(lambda: self.seq != last_seq, timeout)
+            return self.seq, self.jpeg
+
+    def snapshot_json(self):
+        with self.lock:
+            return json.dumps(dict(self.snapshot, publish=self.publish_stats)).encode()
+
+
+def make_handler(view):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, body, content_type):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/":
+                self._send(_INDEX, "text/html")
+            elif self.path == "/snapshot.json":
+                self._send(view.snapshot_json(), "application/json")
+            elif self.path == "/stream.mjpg":
+                self.stream()
+            else:
+                self.send_error(404)
+
+        def stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+            self.end_headers()
+            with view.cond:
+                view.clients += 1
+            seq = 0
+            try:
+                while True:
+                    new_seq, jpeg = view.wait_frame(seq)
+                    if jpeg is None or new_seq == seq:
+                        continue
+                    seq = new_seq
+                    self.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\n")
+                    self.wfile.write(f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                    self.wfile.write(jpeg)
+                    self.wfile.write(b"\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                with view.cond:
+                    view.clients -= 1
+
+    return Handler
+
+
+class HeadlessService:
+    """capture -> measurement -> PLC without any GUI"""
+
+    def __init__(self, points, plc_host=None, plc_port=502, http_port=None, spot=DEFAULT_SPOT,
+                 hotspots=0, alarm_limits=None, prerecord=0, plc_io=False, history=None,
+                 baseline=None, max_stale=MAX_STALE, alarm_address=None):
+        self.points = points
+        self.meter = FixedPointMeter([name for name, _, _ in points])
+        self.spots = SpotMeter()
+        self.spot = parse_spot(spot)
+        self.hotspots = HotspotTracker(hotspots) if hotspots else None
+        channels = [name for name, _, _ in points]
+        if self.hotspots:
+            channels += self.hotspots.names
+        self.alarms = AlarmEngine(channels, **alarm_limits) if alarm_limits else None
+        self.recorder = PreTriggerRecorder(prerecord) if prerecord else None
+        self.clip_request = None
+        self.history = Historian(history) if history else None
+        self.baseline_path = baseline
+        self.baseline = BaselineModel.load(baseline) if baseline else None
+        self.gate = ChangeGate(max_stale=max_stale) if max_stale else None
+        self.contexts = FrameContextCache()  # per-frame products shared by their consumers
+        self.cap = open_frame_source()
+        self.view = LiveView()
+
+        self.plc_client = None
+        if plc_host:
+            from SendtempTCP import ModbusClient, ALARM_ADDRESS
+            self.plc_client = ModbusClient(plc_host, plc_port, hotspots,
+                                           ALARM_ADDRESS if alarm_address is None else alarm_address)
+            if self.plc_client.connect():
+                print("Connected to ModbusClient")
+            else:
+                print("Failed to connect to ModbusClient")
+
+        self.plc_io = None
+        if plc_io and self.plc_client:
+            self.plc_io = PlcInterface(ModbusWords(self.plc_client), channels,
+                                       on_record=self.request_clip)
+            self.plc_io.start()
+
+        # PLC publishing runs on its own deadlines, not on frame arrival
+        self.temps = {}
+        self.sent_alarm_words = None
+        self.scheduler = PublishScheduler()
+        if self.plc_client:
+            self.scheduler.add("temps", SEND_INTERVAL, self.send_temps)
+            if self.alarms:
+                self.scheduler.add("alarms", ALARM_INTERVAL, self.send_alarms)
+        self.scheduler.add("stats", STATS_INTERVAL, self.report_stats, STATS_INTERVAL)
+        self.stop = Event()
+        Thread(target=self.scheduler.run_forever, args=(self.stop,), daemon=True).start()
+
+        self.server = None
+        if http_port:
+            self.server = ThreadingHTTPServer(("", http_port), make_handler(self.view))
+            self.server.daemon_threads = True
+            Thread(target=self.server.serve_forever, daemon=True).start()
+            print(f"Live view on http://0.0.0.0:{http_port}/")
+
+    def request_clip(self, reason):
+        """Called from the PLC polling thread, handled on the next frame"""
+        self.clip_request = reason
+
+    # -------- PUBLISH JOBS --------
+    def send_temps(self):
+        temps = self.temps
+        if not temps:
+            return
+        if self.alarms:
+            # Temperatures and alarm words in one register write
+            alarm_words = self.alarms.words()
+            self.plc_client.send_block(temps, alarm_words)
+            self.sent_alarm_words = alarm_words
+        else:
+            self.plc_client.receive_temp(temps)
+
+    def send_alarms(self):
+        """Alarm words alone at the faster alarm rate, when they change"""
+        alarm_words = self.alarms.words()
+        if alarm_words != self.sent_alarm_words:
+            self.plc_client.send_alarms(alarm_words)
+            self.sent_alarm_words = alarm_words
+
+    def report_stats(self):
+        """Deadline misses per publish job, also in /snapshot.json"""
+        stats = self.scheduler.stats()
+        for name, job in stats.items():
+            print(f"Publish {name}: {job['runs']} runs, {job['misses']} missed, "
+                  f"max late {job['max_late_ms']} ms")
+        if self.gate:
+            stats["frames"] = frames = self.gate.stats()
+            print(f"Frames: {frames['processed']} processed, {frames['skipped']} static "
+                  f"({frames['skipped_pct']}% skipped)")
+        self.view.publish_stats = stats
+
+    def measure(self, rotated):
+        width = rotated.shape[1]
+        temps = {}
+        if not self.points:
+            return temps
+        self.spots.update(rotated)
+        means, _ = self.spots.measure([x for _, x, _ in self.points],
+                                      [y for _, _, y in self.points], self.spot)
+        for (name, x, _), mean in zip(self.points, means):
+            avg_centi = self.meter.update(name, round(mean), zone_of(x, width))
+            temps[name] = round(centi_to_celsius(avg_centi), 1)
+        return temps
+
+    def run(self):
+        seq = 0
+        failures = reopens = 0
+        try:
+            while True:
+                ret, frame = self.cap.read()
+                if not ret:
+                    failures += 1
+                    if failures >= REOPEN_AFTER:
+                        if reopens >= MAX_REOPENS:
+                            # Non-zero exit so a supervisor restarts the service
+                            raise SystemExit(f"No frames after {reopens} reopens of the frame source")
+                        reopens += 1
+                        print(f"No frame for {failures} reads, reopening the frame source")
+                        self.cap.release()
+                        self.cap = open_frame_source()
+                        failures = 0
+                    time.sleep(0.1)
+                    continue
+                failures = reopens = 0
+                seq += 1
+                if self.recorder:
+                    self.recorder.push(frame)
+                    if self.clip_request:
+                        self.recorder.trigger(self.clip_request)
+                        self.clip_request = None
+                if self.gate:
+                    if self.plc_io and self.plc_io.armed:
+                        # A PLC measure-now is answered with this frame's own values
+                        self.gate.invalidate()
+                    if not self.gate.changed(frame):
+                        # Static scene: self.temps stays published and goes
+                        # to the alarms and the history for this frame too,
+                        # so durations and rates of rise run on the clock
+                        if self.alarms:
+                            self.check_alarms(self.temps, time.monotonic())
+                        if self.history:
+                            self.history.record(self.temps)
+                        continue
+                rotated = cv.rotate(frame, ROTATION)
+                ctx = self.contexts.get(rotated, seq)
+                temps = self.measure(rotated)
+                spots = None
+                if self.hotspots:
+                    # Published like points (hot1..hotK), details in the snapshot
+                    spots = self.hotspots.update(rotated)
+                    temps.update({name: spot["temp"] for name, spot in spots.items()})
+                    # Dropped: the PLC gets NaN, not the last temperature
+                    temps.update({name: math.nan for name in self.hotspots.vacant()})
+
+                machine_state = 0
+                if self.plc_io:
+                    # A PLC "measure now" latches exactly this frame's values
+                    machine_state = self.plc_io.on_frame(seq, temps)
+
+                now = time.monotonic()
+                active = ()
+                if self.alarms:
+                    # Evaluated on every frame, one frame of latency
+                    active = self.check_alarms(temps, now)
+                anomalies = self.check_baseline(ctx, machine_state) if self.baseline else None
+                self.view.publish(seq, rotated, temps, spots, active, machine_state, anomalies)
+                if self.history:
+                    self.history.record(temps)
+                self.temps = temps
+        finally:
+            self.close()
+
+    def check_alarms(self, temps, now):
+        """Advance every alarm rule to `now` -> active alarms"""
+        self.alarms.update([temps.get(name, math.nan) for name in self.alarms.names], now)
+        for name, kind, on in self.alarms.transitions():
+            print(f"Alarm {kind} {name}: {'ON' if on else 'cleared'}")
+            if on and self.recorder:
+                self.recorder.trigger(f"{kind}_{name}")
+        return self.alarms.active_alarms()
+
+    def check_baseline(self, ctx, machine_state):
+        """Learn or score against the machine state's baseline -> snapshot entry"""
+        if self.baseline.update(ctx, machine_state):
+            self.baseline.checkpoint(self.baseline_path)
+            return {"learning": True}
+        z = self.baseline.score(ctx, machine_state)
+        scores = self.baseline.roi_scores(z, {name: (x - 2, y - 2, x + 3, y + 3)
+                                              for name, x, y in self.points})
+        return {"learning": False,
+                "pixels": int(np.count_nonzero(self.baseline.anomalies(z))),
+                "points": {name: round(score, 1) for name, score in scores.items()
+                           if abs(score) > self.baseline.z_threshold}}
+
+    def close(self):
+        self.stop.set()
+        if self.plc_io:
+            self.plc_io.stop()
+        if self.server:
+            self.server.shutdown()
+        if self.plc_client:
+            self.plc_client.close()
+        self.cap.release()
+        if self.recorder:
+            self.recorder.close()
+        if self.history:
+            self.history.close()
+        if self.baseline:
+            self.baseline.save(self.baseline_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless thermal measurement service")
+    parser.add_argument("--point", action="append", type=parse_point, default=[],
+                        help="name=x,y on the rotated 120x160 frame, e.g. state1=20,80")
+    parser.add_argument("--plc", help="PLC IP address")
+    parser.add_argument("--port", type=int, default=502)
+    parser.add_argument("--plc-io", action="store_true",
+                        help="poll PLC trigger/state registers and answer measure-now requests")
+    parser.add_argument("--http", type=int, help="serve MJPEG/JSON live view on this port")
+    parser.add_argument("--spot", default=DEFAULT_SPOT, help='"1", "3x3", "5x5" or "r<radius>"')
+    parser.add_argument("--hotspots", type=int, default=0, help="track this many hotspots")
+    parser.add_argument("--history", metavar="DB", help="record every frame's values to this SQLite file")
+    parser.add_argument("--max-stale", type=float, default=MAX_STALE,
+                        help="skip unchanged frames but process one at least every N seconds, 0 = every frame")
+    parser.add_argument("--baseline", metavar="MODEL",
+                        help="learn per-machine-state normal temperatures in this .npz and flag anomalies")
+    alarm = parser.add_argument_group("alarms, applied to every point and hotspot")
+    alarm.add_argument("--lo", type=float, default=math.nan, help="low limit, C")
+    alarm.add_argument("--hi", type=float, default=math.nan, help="high limit, C")
+    alarm.add_argument("--hihi", type=float, default=math.nan, help="high-high limit, C")
+    alarm.add_argument("--ror", type=float, default=math.nan, help="rate-of-rise limit, C/min")
+    alarm.add_argument("--hysteresis", type=float, default=1.0, help="C (C/min for --ror)")
+    alarm.add_argument("--delay", type=float, default=0.0, help="minimum duration, seconds")
+    alarm.add_argument("--alarm-address", type=int,
+                       help="holding register of the packed alarm words, default 112 (SendtempTCP.py)")
+    alarm.add_argument("--prerecord", type=float, default=0,
+                       help="keep this many seconds of raw frames and save a clip per alarm")
+    args = parser.parse_args()
+
+    limits = {"lo": args.lo, "hi": args.hi, "hihi": args.hihi, "rate": args.ror}
+    alarm_limits = None
+    if any(not math.isnan(v) for v in limits.values()):
+        alarm_limits = dict(limits, hysteresis=args.hysteresis, min_duration=args.delay)
+
+    service = HeadlessService(args.point, args.plc, args.port, args.http, args.spot,
+                              args.hotspots, alarm_limits, args.prerecord, args.plc_io, args.history,
+                              args.baseline, args.max_stale, args.alarm_address)
+    try:
+        service.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import sqlite3
+import time
+from queue import Queue, Full, Empty
+from threading import Thread, Event
+
+DEFAULT_DB = "history.db"
+FLUSH_INTERVAL = 1.0       # seconds between write transactions
+RAW_RETENTION = 24 * 3600  # seconds of per-frame samples kept, rollups are kept forever
+PRUNE_INTERVAL = 600       # seconds between raw sample prunes
+QUEUE_SIZE = 10000         # frames buffered for the writer before dropping
+
+ROLLUPS = {"1m": 60, "1h": 3600}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tags (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS samples (tag INTEGER NOT NULL, time REAL NOT NULL, value REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS samples_tag_time ON samples (tag, time);
+"""
+_ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_{name} (
+    tag INTEGER NOT NULL, bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL, sum REAL NOT NULL, min REAL NOT NULL, max REAL NOT NULL,
+    PRIMARY KEY (tag, bucket)) WITHOUT ROWID;
+"""
+_ROLLUP_UPSERT = """
+INSERT INTO rollup_{name} (tag, bucket, count, sum, min, max) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (tag, bucket) DO UPDATE SET
+    count = count + excluded.count, sum = sum + excluded.sum,
+    min = MIN(min, excluded.min), max = MAX(max, excluded.max)
+"""
+
+
+def connect(path=DEFAULT_DB):
+    db = sqlite3.connect(path, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")  # WAL keeps this crash-safe, fewer fsyncs on SD
+    db.executescript(_SCHEMA)
+    for name in ROLLUPS:
+        db.executescript(_ROLLUP_SCHEMA.format(name=name))
+    return db
+
+
+class Historian:
+    """Per-frame tag values to SQLite, written by a background thread.
+
+    record() only enqueues. Once per FLUSH_INTERVAL the writer drains the
+    queue and, in one transaction, inserts the raw samples and folds them
+    into the 1-minute and 1-hour min/sum/max rollups. Raw samples older
+    than RAW_RETENTION are pruned; trends over long ranges read the
+    rollups.
+    """
+
+    def __init__(self, path=DEFAULT_DB, flush_interval=FLUSH_INTERVAL, raw_retention=RAW_RETENTION):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.raw_retention = raw_retention
+        self.queue = Queue(QUEUE_SIZE)
+        self.dropped = 0
+        self.stop_event = Event()
+        self.db = connect(path)
+        self.tag_ids = dict(self.db.execute("SELECT name, id FROM tags"))
+        self.last_prune = 0.0
+        self.writer = Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def record(self, values, timestamp=None):
+        """{tag: value} for one frame, never blocks the caller"""
+        if not values:
+            return
+        try:
+            self.queue.put_nowait((time.time() if timestamp is None else timestamp, dict(values)))
+        except Full:
+            self.dropped += 1
+
+    def close(self):
+        self.stop_event.set()
+        self.writer.join()
+        self.db.close()
+
+    # -------- WRITER THREAD --------
+    def _tag_id(self, name):
+        tag = self.tag_ids.get(name)
+        if tag is None:
+            tag = self.db.execute("INSERT INTO tags (name) VALUES (?)", (name,)).lastrowid
+            self.tag_ids[name] = tag
+        return tag
+
+    def _drain(self):
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except Empty:
+                return items
+
+    def _flush(self, items):
+        rows = []
+        rollups = {name: {} for name in ROLLUPS}
+        for timestamp, values in items:
+            for name, value in values.items():
+                if value is None or value != value:  # skip missing/NaN
+                    continue
+                tag = self._tag_id(name)
+                rows.append((tag, timestamp, value))
+                for rollup, seconds in ROLLUPS.items():
+                    key = (tag, int(timestamp // seconds) * seconds)
+                    agg = rollups[rollup].get(key)
+                    if agg is None:
+                        rollups[rollup][key] = [1, value, value, value]
+                    else:
+                        agg[0] += 1
+                        agg[1] += value
+                        agg[2] = min(agg[2], value)
+                        agg[3] = max(agg[3], value)
+
+        self.db.executemany("INSERT INTO samples (tag, time, value) VALUES (?, ?, ?)", rows)
+        for rollup, aggs in rollups.items():
+            self.db.executemany(_ROLLUP_UPSERT.format(name=rollup),
+                                [key + tuple(agg) for key, agg in aggs.items()])
+
+    def _prune(self, now):
+        if not self.raw_retention or now - self.last_prune < PRUNE_INTERVAL:
+            return
+        self.last_prune = now
+        self.db.execute("DELETE FROM samples WHERE time < ?", (time.time() - self.raw_retention,))
+
+    def _write_loop(self):
+        while True:
+            stopping = self.stop_event.wait(self.flush_interval)
+            items = self._drain()
+            if items:
+                with self.db:  # one transaction per flush
+                    self._flush(items)
+            with self.db:
+                self._prune(time.monotonic())
+            if stopping:
+                return
+
+
+# -------- QUERIES --------
+def query(db, tag, start, end, resolution="auto"):
+    """Trend of one tag between two epoch times.
+
+    resolution "raw" -> [(time, value)], "1m"/"1h" -> [(bucket, min, mean, max)];
+    "auto" picks raw up to 2 hours, 1m up to 7 days, 1h beyond.
+    """
+    if resolution == "auto":
+        span = end - start
+        resolution = "raw" if span <= 7200 else "1m" if span <= 7 * 86400 else "1h"
+    row = db.execute("SELECT id FROM tags WHERE name = ?", (tag,)).fetchone()
+    if row is None:
+        return []
+    if resolution == "raw":
+        return db.execute("SELECT time, value FROM samples WHERE tag = ? AND time >= ? AND time < ?"
+                          " ORDER BY time", (row[0], start, end)).fetchall()
+    if resolution not in ROLLUPS:
+        raise ValueError(f"Unknown resolution {resolution!r}")
+    # Include the bucket that contains `start`
+    return db.execute(f"SELECT bucket, min, sum / count, max FROM rollup_{resolution}"
+                      " WHERE tag = ? AND bucket > ? AND bucket < ? ORDER BY bucket",
+                      (row[0], start - ROLLUPS[resolution], end)).fetchall()
+
+
+def tags(db):
+    return [name for (name,) in db.execute("SELECT name FROM tags ORDER BY name")]
+
+
+def main():
+    import argparse
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="Print a tag's trend from the historian")
+    parser.add_argument("tag", nargs="?", help="omit to list the recorded tags")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--resolution", default="auto", choices=["auto", "raw"] + list(ROLLUPS))
+    args = parser.parse_args()
+
+    db = connect(args.db)
+    if args.tag is None:
+        print("\n".join(tags(db)))
+        return
+    end = time.time()
+    for row in query(db, args.tag, end - args.hours * 3600, end, args.resolution):
+        stamp = datetime.fromtimestamp(row[0]).strftime("%Y-%m-%d %H:%M:%S")
+        print(stamp, " ".join(f"{v:.1f}" for v in row[1:]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import cv2 as cv
+import numpy as np
+
+from fixedpoint import FixedPointMeter, centi_to_celsius, celsius_to_raw
+from lepton import zone_of
+
+CANDIDATES = 4     # local maxima considered per requested hotspot
+PEAK_WINDOW = 5    # native pixels, a peak is the max of its window
+MARGIN_RAW = 300   # blobs grow down to 3 C below the coldest peak kept
+MIN_CELSIUS = 30   # nothing colder than this is a hotspot
+MAX_DISTANCE = 12  # native pixels a hotspot may move between frames
+MAX_MISSED = 5     # frames a hotspot survives without a match
+
+
+class Hotspot:
+    """One blob in one frame, native rotated coordinates"""
+
+    def __init__(self, x, y, area, peak_raw, peak_xy):
+        self.x = x
+        self.y = y
+        self.area = area
+        self.peak_raw = peak_raw
+        self.peak_xy = peak_xy
+        self.id = None
+        self.missed = 0
+
+
+def find_hotspots(frame, k=3, margin_raw=MARGIN_RAW, min_raw=celsius_to_raw(MIN_CELSIUS)):
+    """Up to k hottest blobs of a native Y16 frame, hottest first.
+
+    Seeds are the top local maxima, picked with np.argpartition (no full
+    sort); blobs are the 8-connected components of frame >= threshold
+    that contain a seed, ranked by their hottest seed.
+    """
+    flat = frame.ravel()
+    peaks = cv.dilate(frame, np.ones((PEAK_WINDOW, PEAK_WINDOW), np.uint8))
+    peaks = np.flatnonzero((frame == peaks) & (frame >= min_raw))
+    if peaks.size == 0:
+        return []
+    n = min(k * CANDIDATES, peaks.size)
+    seeds = peaks[np.argpartition(flat[peaks], peaks.size - n)[peaks.size - n:]]
+    seeds = seeds[np.argsort(flat[seeds])[::-1]]
+
+    threshold = max(int(flat[seeds[min(k, n) - 1]]) - margin_raw, min_raw)
+    mask = (frame >= threshold).view(np.uint8)
+    _, labels, stats, centroids = cv.connectedComponentsWithStats(mask, connectivity=8)
+
+    width = frame.shape[1]
+    spots = []
+    seen = set()
+    for seed in seeds:
+        label = labels.flat[seed]
+        if label == 0 or label in seen:
+            continue
+        seen.add(label)
+        # Seeds are visited hottest first, so this one is the blob's peak
+        cx, cy = centroids[label]
+        spots.append(Hotspot(float(cx), float(cy), int(stats[label, cv.CC_STAT_AREA]),
+                             int(flat[seed]), (int(seed % width), int(seed // width))))
+        if len(spots) == k:
+            break
+    return spots
+
+
+class HotspotTracker:
+    """Keeps hotspot identities across frames by nearest-centroid matching.
+
+    Tracked hotspots are published in k fixed slots ("hot1".."hotK") so a
+    hotspot keeps its name, and its smoothing, while it is tracked. A
+    dropped hotspot leaves its slot vacant until a new one takes it.
+    """
+
+    def __init__(self, k=3, max_distance=MAX_DISTANCE, max_missed=MAX_MISSED):
+        self.k = k
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.names = [f"hot{i + 1}" for i in range(k)]
+        self.meter = FixedPointMeter(self.names)
+        self.slots = [None] * k   # Hotspot per slot
+        self.next_id = 1
+
+    def _match(self, detections):
+        tracked = [(i, t) for i, t in enumerate(self.slots) if t is not None]
+        pairs = []
+        for i, t in tracked:
+            for j, d in enumerate(detections):
+                dist = np.hypot(t.x - d.x, t.y - d.y)
+                if dist <= self.max_distance:
+                    pairs.append((dist, i, j))
+        pairs.sort()
+
+        used_slots, used_dets = set(), set()
+        for _, i, j in pairs:
+            if i in used_slots or j in used_dets:
+                continue
+            used_slots.add(i)
+            used_dets.add(j)
+            detections[j].id = self.slots[i].id
+            self.slots[i] = detections[j]
+
+        for i, t in tracked:
+            if i not in used_slots:
+                t.missed += 1
+                if t.missed > self.max_missed:
+                    self.slots[i] = None
+                    self.meter.smoothers[self.names[i]].clear()
+
+        for j, d in enumerate(detections):
+            if j in used_dets:
+                continue
+            free = [i for i, t in enumerate(self.slots) if t is None]
+            if not free:
+                break
+            d.id = self.next_id
+            self.next_id += 1
+            self.slots[free[0]] = d
+
+    def update(self, frame):
+        """Native rotated Y16 frame -> {slot name: hotspot dict} for this frame"""
+        self._match(find_hotspots(frame, self.k))
+
+        width = frame.shape[1]
+        published = {}
+        for name, spot in zip(self.names, self.slots):
+            if spot is None or spot.missed:
+                continue
+            avg_centi = self.meter.update(name, spot.peak_raw, zone_of(spot.peak_xy[0], width))
+            published[name] = {
+                "id": spot.id,
+                "temp": round(centi_to_celsius(avg_centi), 1),
+                "x": round(spot.x, 1),
+                "y": round(spot.y, 1),
+                "area": spot.area,
+            }
+        return published
+
+    def vacant(self):
+        """Slot names with no tracked hotspot, published as NaN (no value)"""
+        return [name for name, spot in zip(self.names, self.slots) if spot is None]
+
+    def clear(self):
+        self.slots = [None] * self.k
+        self.meter.clear()
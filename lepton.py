@@ -0,0 +1,46 @@
+import cv2 as cv
+
+# Lepton 3.1R native output (Y16, centi-Kelvin)
+FRAME_WIDTH = 160
+FRAME_HEIGHT = 120
+FRAME_SHAPE = (FRAME_HEIGHT, FRAME_WIDTH)
+KELVIN_OFFSET = 27315  # 273.15 * 100
+
+# Frames are shown rotated, zones are split on the rotated image
+ROTATION = cv.ROTATE_90_CLOCKWISE
+
+# Per-zone linear compensation (same values as the GUIs)
+COMPENSATION = {
+    "left": {"m": 0.752, "b": 5.093},
+    "middle": {"m": 0.728, "b": 5.142},
+    "right": {"m": 0.704, "b": 5.190},
+}
+
+
+def open_lepton(index=0):
+    """Open the Lepton as a raw Y16 V4L2 capture"""
+    cap = cv.VideoCapture(index, cv.CAP_V4L2)
+    cap.set(cv.CAP_PROP_FOURCC, cv.VideoWriter_fourcc('Y', '1', '6', ' '))
+    cap.set(cv.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
+    cap.set(cv.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+    cap.set(cv.CAP_PROP_FPS, 9)
+    cap.set(cv.CAP_PROP_CONVERT_RGB, 0)
+    return cap
+
+
+def raw_to_celsius(raw_value):
+    """Convert raw thermal value to Celsius"""
+    return (raw_value / 100) - 273.15
+
+
+def zone_of(x, width):
+    if x < width // 3:
+        return "left"
+    elif x < 2 * width // 3:
+        return "middle"
+    return "right"
+
+
+def apply_zone(temp_celsius, zone):
+    comp = COMPENSATION[zone]
+    return ((temp_celsius - comp["b"]) / comp["m"]) - 9
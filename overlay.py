@@ -0,0 +1,152 @@
+from collections import OrderedDict
+
+import cv2 as cv
+import numpy as np
+
+
+class TextSpriteCache:
+    """Pre-rendered text masks for one Hershey font/scale/thickness.
+
+    A string is rendered with putText the first time it is seen, and its
+    anti-aliased coverage is kept as alpha; drawing it again is one small
+    blend. Readouts repeat a small set of strings
+    (names, temperatures at 0.1 C), so the cache is bounded and LRU.
+    """
+
+    def __init__(self, font=cv.FONT_HERSHEY_DUPLEX, scale=0.8, thickness=2, size=512):
+        self.font = font
+        self.scale = scale
+        self.thickness = thickness
+        self.size = size
+        self.sprites = OrderedDict()
+
+    def sprite(self, text):
+        s = self.sprites.get(text)
+        if s is None:
+            (w, h), baseline = cv.getTextSize(text, self.font, self.scale, self.thickness)
+            pad = self.thickness
+            mask = np.zeros((h + baseline + 2 * pad, w + 2 * pad), dtype=np.uint8)
+            cv.putText(mask, text, (pad, h + pad), self.font, self.scale, 255, self.thickness)
+            # (alpha (h, w, 1) in 0..1, rows above the baseline)
+            s = (mask[..., None] * np.float32(1 / 255), h + pad)
+            self.sprites[text] = s
+            if len(self.sprites) > self.size:
+                self.sprites.popitem(last=False)
+        else:
+            self.sprites.move_to_end(text)
+        return s
+
+    def put_text(self, frame, text, org, color):
+        """Same result as cv.putText(frame, text, org, ...) for this font on
+        a BGR frame, to within one level of rounding on the anti-aliased
+        edges. On an RGBA layer the alpha channel is blended like the others.
+
+        Returns the (y0, y1, x0, x1) rectangle that was drawn, or None.
+        """
+        alpha, ascent = self.sprite(text)
+        x, y = org
+        top, left = y - ascent, x - self.thickness
+        mh, mw = alpha.shape[:2]
+        fh, fw = frame.shape[:2]
+        # Clip the sprite to the frame
+        y0, x0 = max(top, 0), max(left, 0)
+        y1, x1 = min(top + mh, fh), min(left + mw, fw)
+        if y0 < y1 and x0 < x1:
+            region = frame[y0:y1, x0:x1]
+            a = alpha[y0 - top:y1 - top, x0 - left:x1 - left]
+            # putText blends the glyph edges into what is already there
+            blended = (np.asarray(color, dtype=np.float32) - region) * a
+            blended += region
+            np.rint(blended, out=blended)
+            region[...] = blended
+            return y0, y1, x0, x1
+        return None
+
+
+class OverlayCompositor:
+    """Static overlay (zone lines, titles, color bar) rendered once.
+
+    Static elements are drawn into an RGBA layer when the layout changes.
+    Drawing blends color into transparent pixels, so the layer is
+    premultiplied (QImage.Format_RGBA8888_Premultiplied for Qt);
+    the opaque pixels are kept as a flat index list, so compositing is one
+    indexed copy proportional to the overlay area, not the frame area.
+
+    For painters that composite themselves (Qt), begin() returns an RGBA
+    frame layer holding the static layer plus dynamic items; only the
+    rectangles dirtied by the previous frame are restored.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.rgba = np.zeros((height, width, 4), dtype=np.uint8)
+        self._index = None
+        self._colors = None
+        self.version = 0
+
+        self.frame_rgba = None
+        self._frame_version = None
+        self._dirty = []
+
+    # -------- STATIC LAYER --------
+    def clear(self):
+        self.rgba[:] = 0
+        self._index = None
+
+    def line(self, p1, p2, color, thickness=1):
+        cv.line(self.rgba, p1, p2, (*color, 255), thickness)
+        self._index = None
+
+    def text(self, text, org, font, scale, color, thickness=1):
+        cv.putText(self.rgba, text, org, font, scale, (*color, 255), thickness)
+        self._index = None
+
+    def image(self, bgr, x, y):
+        h, w = bgr.shape[:2]
+        self.rgba[y:y + h, x:x + w, :3] = bgr
+        self.rgba[y:y + h, x:x + w, 3] = 255
+        self._index = None
+
+    def _bake(self):
+        flat = self.rgba.reshape(-1, 4)
+        self._index = np.flatnonzero(flat[:, 3])
+        self._colors = flat[self._index, :3].copy()
+        self.version += 1
+
+    def begin(self):
+        """RGBA layer for this frame: static content, previous dynamic items erased"""
+        if self._index is None:
+            self._bake()
+        if self.frame_rgba is None or self._frame_version != self.version:
+            self.frame_rgba = self.rgba.copy()
+            self._frame_version = self.version
+        else:
+            for y0, y1, x0, x1 in self._dirty:
+                self.frame_rgba[y0:y1, x0:x1] = self.rgba[y0:y1, x0:x1]
+        self._dirty = []
+        return self.frame_rgba
+
+    def mark(self, rect):
+        """Remember a (y0, y1, x0, x1) area drawn on the frame layer"""
+        if rect is not None:
+            self._dirty.append(rect)
+
+    def apply(self, frame):
+        """Composite the static layer onto a BGR frame in place"""
+        if self._index is None:
+            self._bake()
+        frame.reshape(-1, 3)[self._index] = self._colors
+        return frame
+
+
+def zone_overlay(width, height, color=(255, 255, 255)):
+    """LEFT/MIDDLE/RIGHT dividers and titles as drawn by the GUIs"""
+    overlay = OverlayCompositor(width, height)
+    third = width // 3
+    overlay.line((third, 0), (third, height), color, 1)
+    overlay.line((2 * third, 0), (2 * third, height), color, 1)
+    overlay.text("LEFT", (third // 2 - 40, 30), cv.FONT_HERSHEY_PLAIN, 2, color, 2)
+    overlay.text("MIDDLE", (third + third // 2 - 40, 30), cv.FONT_HERSHEY_PLAIN, 2, color, 2)
+    overlay.text("RIGHT", (2 * third + third // 2 - 40, 30), cv.FONT_HERSHEY_PLAIN, 2, color, 2)
+    return overlay
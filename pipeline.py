@@ -0,0 +1,242 @@
+import argparse
+import multiprocessing as mp
+import time
+from queue import Full, Empty
+
+import cv2 as cv
+import numpy as np
+
+from framering import SharedFrameRing
+from fixedpoint import FixedPointMeter, centi_to_celsius
+from lepton import open_lepton, zone_of, ROTATION
+from spotmeter import SpotMeter, parse_spot, DEFAULT_SPOT
+
+BUF_SIZE = 2
+RING_SLOTS = 8
+SEND_INTERVAL = 1.0  # seconds
+STALL_SECONDS = 30   # a viewer waits this long for frames (capture restarts) before failing
+
+
+def _offer(q, item):
+    """Non-blocking put, a consumer that is behind simply misses the item"""
+    try:
+        q.put_nowait(item)
+    except Full:
+        pass
+
+
+def _latest(q, timeout):
+    """Block for one item, then drain the queue and keep only the newest"""
+    item = q.get(timeout=timeout)
+    while True:
+        try:
+            item = q.get_nowait()
+        except Empty:
+            return item
+
+
+# -------- STAGES --------
+def capture_stage(ring_name, queues, stop):
+    """Camera owner: write every frame into the ring and announce its seq"""
+    ring = SharedFrameRing(ring_name)
+    cap = open_lepton()
+    try:
+        while not stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                print("No frame received")
+                time.sleep(0.1)
+                continue
+            seq = ring.write(frame)
+            for q in queues:
+                _offer(q, seq)
+    finally:
+        cap.release()
+        ring.close()
+
+
+def analysis_stage(ring_name, in_q, out_qs, points, stop, spot=DEFAULT_SPOT):
+    """Read the points configured on the rotated native frame"""
+    ring = SharedFrameRing(ring_name)
+    frame = np.empty(ring.shape, dtype=np.uint16)
+    meter = FixedPointMeter([name for name, _, _ in points])
+    spots = SpotMeter()
+    spot = parse_spot(spot)
+    xs = [x for _, x, _ in points]
+    ys = [y for _, _, y in points]
+    try:
+        while not stop.is_set():
+            try:
+                seq = _latest(in_q, timeout=0.5)
+            except Empty:
+                continue
+            if ring.read(seq, frame) is None:
+                continue  # overwritten while we were busy
+            rotated = cv.rotate(frame, ROTATION)
+            width = rotated.shape[1]
+
+            temps = {}
+            if points:
+                spots.update(rotated)
+                means, _ = spots.measure(xs, ys, spot)
+                for (name, x, _), mean in zip(points, means):
+                    avg_centi = meter.update(name, round(mean), zone_of(x, width))
+                    temps[name] = round(centi_to_celsius(avg_centi), 1)
+
+            for q in out_qs:
+                _offer(q, (seq, temps))
+    finally:
+        ring.close()
+
+
+def plc_stage(in_q, host, port, stop):
+    """Forward the newest analysis result to the PLC once per interval"""
+    from SendtempTCP import ModbusClient
+
+    client = ModbusClient(host, port)
+    if not client.connect():
+        print("Failed to connect to ModbusClient")
+    try:
+        while not stop.is_set():
+            try:
+                _, temps = _latest(in_q, timeout=SEND_INTERVAL)
+            except Empty:
+                continue
+            client.receive_temp(temps)
+            stop.wait(SEND_INTERVAL)
+    finally:
+        client.close()
+
+
+# -------- SUPERVISOR --------
+class Pipeline:
+    """Capture, analysis and PLC stages in separate processes.
+
+    The capture process is the only camera owner. Consumers are attached to
+    the shared ring and get frame sequence numbers through small queues, so
+    a crashed consumer is restarted without touching the camera.
+
+    points=None runs capture only, for viewers that measure themselves.
+    """
+
+    def __init__(self, points, plc_host=None, plc_port=502, viewers=1, spot=DEFAULT_SPOT):
+        self.points = points
+        self.plc_host = plc_host
+        self.plc_port = plc_port
+
+        self.stop = mp.Event()
+        self.ring = SharedFrameRing(slots=RING_SLOTS, create=True)
+        self.analysis_q = mp.Queue(BUF_SIZE)
+        self.viewer_qs = [mp.Queue(BUF_SIZE) for _ in range(viewers)]
+        self.plc_q = mp.Queue(BUF_SIZE)
+        self.result_q = mp.Queue(BUF_SIZE)
+
+        analysis = points is not None
+        frame_qs = ([self.analysis_q] if analysis else []) + self.viewer_qs
+        result_qs = [self.result_q] + ([self.plc_q] if plc_host else [])
+        self.specs = {"capture": (capture_stage, (self.ring.name, frame_qs, self.stop))}
+        if analysis:
+            self.specs["analysis"] = (analysis_stage, (self.ring.name, self.analysis_q, result_qs,
+                                                       self.points, self.stop, spot))
+        if analysis and plc_host:
+            self.specs["plc"] = (plc_stage, (self.plc_q, plc_host, plc_port, self.stop))
+        self.procs = {}
+
+    def _spawn(self, name):
+        target, args = self.specs[name]
+        proc = mp.Process(target=target, args=args, name=name, daemon=True)
+        proc.start()
+        self.procs[name] = proc
+
+    def start(self):
+        for name in self.specs:
+            self._spawn(name)
+
+    def watch(self):
+        """Restart any stage that died"""
+        for name, proc in self.procs.items():
+            if not proc.is_alive() and not self.stop.is_set():
+                print(f"Stage {name} exited with code {proc.exitcode}, restarting")
+                self._spawn(name)
+
+    def viewer(self, index=0):
+        return RingCapture(self.ring.name, self.viewer_qs[index])
+
+    def shutdown(self):
+        self.stop.set()
+        for proc in self.procs.values():
+            proc.join(timeout=2)
+            if proc.is_alive():
+                proc.terminate()
+        self.ring.close()
+
+
+class RingCapture:
+    """cv.VideoCapture-like reader of the newest frame in a SharedFrameRing.
+
+    read() keeps waiting while the capture stage starts or is restarted by
+    the watchdog, and only fails after stall_seconds without a frame.
+    """
+
+    def __init__(self, ring_name, seq_q, timeout=1.0, stall_seconds=STALL_SECONDS):
+        self.ring = SharedFrameRing(ring_name)
+        self.seq_q = seq_q
+        self.timeout = timeout
+        self.stall_seconds = stall_seconds
+
+    def isOpened(self):
+        return self.ring is not None
+
+    def read(self):
+        deadline = time.monotonic() + self.stall_seconds
+        while True:
+            try:
+                seq = _latest(self.seq_q, self.timeout)
+            except Empty:
+                if time.monotonic() >= deadline:
+                    return False, None
+                continue
+            frame = self.ring.read(seq)
+            if frame is not None:
+                return True, frame
+
+    def release(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+
+def parse_point(text):
+    name, xy = text.split("=")
+    x, y = xy.split(",")
+    return name, int(x), int(y)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-process thermal pipeline")
+    parser.add_argument("--point", action="append", type=parse_point, default=[],
+                        help="name=x,y on the rotated 120x160 frame, e.g. state1=20,80")
+    parser.add_argument("--plc", help="PLC IP address")
+    parser.add_argument("--port", type=int, default=502)
+    parser.add_argument("--spot", default=DEFAULT_SPOT, help='"1", "3x3", "5x5" or "r<radius>"')
+    args = parser.parse_args()
+
+    pipeline = Pipeline(args.point, args.plc, args.port, viewers=0, spot=args.spot)
+    pipeline.start()
+    print("Pipeline started, Ctrl+C to stop")
+    try:
+        while True:
+            pipeline.watch()
+            try:
+                seq, temps = _latest(pipeline.result_q, timeout=1.0)
+                print(f"Frame {seq}: {temps}")
+            except Empty:
+                pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pipeline.shutdown()
+
+
+if __name__ == "__main__":
+    main()
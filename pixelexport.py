@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from lepton import FRAME_HEIGHT, raw_to_celsius
+from sessions import Session
+
+TILE = 16      # pixels per tile side
+CHUNK = 512    # frames transposed per pass, bounds memory to CHUNK * H * W * 2 bytes
+META = "meta.json"
+
+
+def _tiles(shape, tile):
+    """(row, col, y0, y1, x0, x1) of every tile covering a frame"""
+    h, w = shape
+    for row, y0 in enumerate(range(0, h, tile)):
+        for col, x0 in enumerate(range(0, w, tile)):
+            yield row, col, y0, min(y0 + tile, h), x0, min(x0 + tile, w)
+
+
+def _tile_path(directory, row, col):
+    return os.path.join(directory, f"tile_{row:02d}_{col:02d}.npy")
+
+
+def export(session, directory, tile=TILE, chunk=CHUNK):
+    """Transpose a recorded session into pixel-major tiles.
+
+    Every tile is an .npy of shape (tile_h, tile_w, T), so one pixel's
+    whole history is contiguous in one file. The session is read CHUNK
+    frames at a time and each chunk is scattered into all tiles, which
+    keeps memory bounded whatever the session length.
+    """
+    os.makedirs(directory, exist_ok=True)
+    total = len(session)
+    tiles = {}
+    for row, col, y0, y1, x0, x1 in _tiles(session.shape, tile):
+        tiles[row, col] = (np.lib.format.open_memmap(
+            _tile_path(directory, row, col), mode="w+", dtype=np.uint16,
+            shape=(y1 - y0, x1 - x0, total)), y0, y1, x0, x1)
+    times = np.lib.format.open_memmap(os.path.join(directory, "times.npy"), mode="w+",
+                                      dtype=np.float64, shape=(total,))
+
+    for first, chunk_times, frames in session.chunks(chunk):
+        last = first + len(frames)
+        times[first:last] = chunk_times
+        for data, y0, y1, x0, x1 in tiles.values():
+            data[:, :, first:last] = frames[:, y0:y1, x0:x1].transpose(1, 2, 0)
+        for data, *_ in tiles.values():
+            data.flush()  # keep dirty pages bounded too
+        print(f"Exported {last}/{total} frames")
+
+    times.flush()
+    with open(os.path.join(directory, META), "w") as f:
+        json.dump({"frames": total, "shape": list(session.shape), "tile": tile,
+                   "source": os.path.abspath(session.path)}, f, indent=2)
+
+
+class PixelArchive:
+    """Read side of an export: pixel and region histories touching only their tiles.
+
+    Coordinates are on the native (unrotated) frame; rotated_to_native()
+    converts GUI/pipeline points.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, META)) as f:
+            meta = json.load(f)
+        self.frames = meta["frames"]
+        self.shape = tuple(meta["shape"])
+        self.tile = meta["tile"]
+        self.times = np.load(os.path.join(directory, "times.npy"), mmap_mode="r")
+        self._tiles = {}
+
+    def _tile(self, row, col):
+        data = self._tiles.get((row, col))
+        if data is None:
+            data = self._tiles[row, col] = np.load(_tile_path(self.directory, row, col), mmap_mode="r")
+        return data
+
+    def pixel(self, x, y, start=0, stop=None):
+        """Raw Y16 history of one pixel -> (times, values)"""
+        if not (0 <= x < self.shape[1] and 0 <= y < self.shape[0]):
+            raise ValueError(f"Pixel {x},{y} outside {self.shape[1]}x{self.shape[0]}")
+        data = self._tile(y // self.tile, x // self.tile)
+        return self.times[start:stop], np.array(data[y % self.tile, x % self.tile, start:stop])
+
+    def region(self, x0, y0, x1, y1, start=0, stop=None):
+        """Raw Y16 history of pixels x0..x1-1, y0..y1-1 -> (times, (h, w, n) array)"""
+        n = len(self.times[start:stop])
+        out = np.empty((y1 - y0, x1 - x0, n), dtype=np.uint16)
+        t = self.tile
+        for row in range(y0 // t, (y1 - 1) // t + 1):
+            for col in range(x0 // t, (x1 - 1) // t + 1):
+                ty0, tx0 = row * t, col * t
+                ya, yb = max(y0, ty0), min(y1, ty0 + t)
+                xa, xb = max(x0, tx0), min(x1, tx0 + t)
+                out[ya - y0:yb - y0, xa - x0:xb - x0] = \
+                    self._tile(row, col)[ya - ty0:yb - ty0, xa - tx0:xb - tx0, start:stop]
+        return self.times[start:stop], out
+
+
+def rotated_to_native(x, y, height=FRAME_HEIGHT):
+    """Point on the clockwise-rotated 120x160 frame -> native 160x120 frame"""
+    return y, height - 1 - x
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-pixel time series from recorded sessions")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="transpose a session into pixel-major tiles")
+    exp.add_argument("session", help=".npy/.npz recording or a directory of them")
+    exp.add_argument("output", help="export directory")
+    exp.add_argument("--tile", type=int, default=TILE)
+    exp.add_argument("--chunk", type=int, default=CHUNK, help="frames held in memory at once")
+    pix = sub.add_parser("pixel", help="print one pixel's history as CSV")
+    pix.add_argument("output", help="export directory")
+    pix.add_argument("point", help="x,y on the native frame")
+    pix.add_argument("--rotated", action="store_true", help="x,y is on the rotated 120x160 frame")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export(Session(args.session), args.output, args.tile, args.chunk)
+        return
+    x, y = (int(v) for v in args.point.split(","))
+    if args.rotated:
+        x, y = rotated_to_native(x, y)
+    times, values = PixelArchive(args.output).pixel(x, y)
+    print("time,celsius")
+    for t, v in zip(times, raw_to_celsius(values.astype(np.float64))):
+        print(f"{t:.3f},{v:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import math
+import time
+from threading import Thread, Event, Lock
+
+from regcodec import RegisterCodec, as_signed
+
+COMMAND_ADDRESS = 200  # PLC -> us: control word, machine state, request id
+COMMAND_WORDS = 3
+RESULT_ADDRESS = 220   # us -> PLC: status, echoed request id, frame seq, values
+POLL_HZ = 20
+
+# Control word bits (written by the PLC)
+REQ_MEASURE = 0x0001   # "measure now", held until the result is acknowledged
+REQ_RECORD = 0x0002    # save a pre-trigger clip (prerecord.py)
+
+# Status word bits (written by us)
+RESULT_READY = 0x0001
+
+
+class ModbusWords:
+    """Word access over SendtempTCP/gui(TCP) ModbusClient, floats as 2 swapped words"""
+
+    def __init__(self, client):
+        self.client = client
+        # Own buffers: the client's codec is also used by its publish thread
+        codec = client.codec
+        self.codec = RegisterCodec(codec.kind, codec.scale, codec.word_swap, codec.byte_swap)
+
+    def read_words(self, address, count):
+        with self.client.lock:
+            resp = self.client.client.read_holding_registers(address=address, count=count)
+        if resp.isError():
+            return None
+        return resp.registers
+
+    def write_words(self, address, values):
+        with self.client.lock:
+            self.client.client.write_registers(address=address, values=list(values))
+
+
+class McWords:
+    """Word access over a pymcprotocol Type3E, values as centi-degree words"""
+
+    def __init__(self, plc):
+        self.plc = plc
+        self.lock = Lock()
+        self.codec = RegisterCodec("int16", scale=100)
+
+    def read_words(self, address, count):
+        with self.lock:
+            words = self.plc.batchread_wordunits(headdevice=f"D{address}", readlength=count)
+        # pymcprotocol unpacks words as signed shorts too
+        return [v & 0xFFFF for v in words]
+
+    def write_words(self, address, values):
+        with self.lock:
+            # pymcprotocol packs words as signed shorts
+            self.plc.batchwrite_wordunits(headdevice=f"D{address}", values=as_signed(values))
+
+
+class PlcInterface:
+    """PLC-driven measurement: trigger/state polling and a latched result block.
+
+    poll() reads the command block in one batched read and writes any
+    pending result; call it from start()'s thread or a GUI timer. The
+    frame loop calls on_frame() once per frame: it returns the machine
+    state sampled for that frame and, if the PLC asked for a measurement,
+    latches this frame's values. Result block layout:
+
+        +0 status (RESULT_READY)   +1 echoed request id
+        +2 frame seq, low word     +3 frame seq, high word
+        +4 one value per channel, encoded by the words' codec; a channel
+           without a reading is NaN (-32768 as centi-degree words)
+
+    Handshake: the PLC sets REQ_MEASURE, waits for RESULT_READY with its
+    request id echoed, reads the values and clears REQ_MEASURE; we then
+    clear RESULT_READY.
+    """
+
+    def __init__(self, words, channels, command_address=COMMAND_ADDRESS,
+                 result_address=RESULT_ADDRESS, poll_hz=POLL_HZ, on_record=None):
+        self.words = words
+        self.channels = list(channels)
+        self.command_address = command_address
+        self.result_address = result_address
+        self.interval = 1.0 / poll_hz
+        self.on_record = on_record
+
+        self.control = 0
+        self.machine_state = 0
+        self.request_id = 0
+        self.armed = False       # measure request seen, waiting for a frame
+        self.ready = False       # result written, waiting for the PLC to ack
+        self.result = None       # registers for the result block
+        self.clear_status = False
+
+        self.wake = Event()
+        self.stop_event = Event()
+        self.thread = None
+
+    # -------- FRAME SIDE --------
+    def on_frame(self, seq, values):
+        """Machine state for this frame; latches values if a measurement is armed"""
+        if self.armed:
+            self.armed = False
+            regs = [RESULT_READY, self.request_id, seq & 0xFFFF, (seq >> 16) & 0xFFFF]
+            regs.extend(self.words.codec.encode([values.get(name, math.nan) for name in self.channels]).tolist())
+            self.result = regs
+            self.wake.set()  # written right away, not on the next poll tick
+        return self.machine_state
+
+    # -------- PLC SIDE --------
+    def poll(self):
+        result = self.result
+        if result is not None:
+            self.words.write_words(self.result_address, result)
+            # Dropped only once written, a failed write is retried next poll
+            if self.result is result:
+                self.result = None
+            self.ready = True
+        elif self.clear_status:
+            self.words.write_words(self.result_address, [0])
+            self.ready = self.clear_status = False
+
+        block = self.words.read_words(self.command_address, COMMAND_WORDS)
+        if block is None:
+            return
+        control, self.machine_state, request_id = block[:COMMAND_WORDS]
+        rising = control & ~self.control
+        self.control = control
+
+        if rising & REQ_MEASURE:
+            self.request_id = request_id
+            self.armed = True
+        elif not control & REQ_MEASURE and self.ready:
+            self.clear_status = True
+            self.wake.set()
+        if rising & REQ_RECORD and self.on_record:
+            self.on_record("plc")
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"PLC poll error: {e}")
+                time.sleep(1.0)
+            self.wake.wait(self.interval)
+            self.wake.clear()
+
+    def start(self):
+        self.thread = Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake.set()
+        if self.thread:
+            self.thread.join(timeout=2)
@@ -1,10 +1,16 @@
 import cv2 as cv
 import numpy as np
 from datetime import datetime
-import time
-from collections import deque
 from queue import Queue, Full, Empty
 from SendtempTCP import ModbusClient
+from framebroker import open_frame_source
+from fixedpoint import FixedPointMeter, centi_to_celsius, fixed_compensation
+from autorange import AutoRange
+from framecontext import FrameContextCache
+from thermaldisplay import DisplayEngine
+from overlay import TextSpriteCache, zone_overlay
+from spotmeter import SpotMeter, parse_spot
+from scheduler import PublishScheduler
 
 # Temperature range
 minraw = 26315  # --> -10 celsius
@@ -12,28 +18,20 @@ maxraw = 42315  # --> 150 celsius
 # maxraw = 47315  # --> 200 celsius
 
 BUF_SIZE = 2
+AUTO_RANGE = True   # display limits follow the scene (autorange.py)
+SPOT = "3x3"        # point spot size: "1", "3x3", "5x5" or "r<radius>" (spotmeter.py)
+SEND_INTERVAL = 1.0  # seconds, on monotonic deadlines (scheduler.py)
 
 class ThermalCamera:
     def __init__(self):
-        self.cap = cv.VideoCapture(0, cv.CAP_V4L2)
-        self.cap.set(cv.CAP_PROP_FOURCC, cv.VideoWriter_fourcc('Y', '1', '6', ' '))
-        self.cap.set(cv.CAP_PROP_FRAME_WIDTH, 160)
-        self.cap.set(cv.CAP_PROP_FRAME_HEIGHT, 120)
-        self.cap.set(cv.CAP_PROP_FPS, 9)
-        self.cap.set(cv.CAP_PROP_CONVERT_RGB, 0)
+        # Shares the camera with the GUIs when framebroker.py is running
+        self.cap = open_frame_source()
         self.points = []
 
         self.p1 = None
         self.p2 = None
         self.p3 = None
 
-        # Buffers for each point
-        self.buffers = {
-            "state1": deque(maxlen=5),
-            "state2": deque(maxlen=5),
-            "state3": deque(maxlen=5),
-        }
-
         self.compensation = {
             "left" : {"m": 0.752, "b": 5.093},
             #"middle" : {"m": 0.885, "b": 0.731},
@@ -41,12 +39,23 @@ class ThermalCamera:
             "middle" : {"m": 0.728, "b": 5.142},
             "right" : {"m": 0.704, "b": 5.190}
         }
+        self.meter = FixedPointMeter(["state1", "state2", "state3"],
+                                     compensation=fixed_compensation(self.compensation))
 
         self.avg_temp_send = {
             "state1": [],
             "state2": [],
             "state3": []
         }
+        self.display = DisplayEngine("jet", minraw, maxraw)
+        self.auto_range = AutoRange(self.display, minraw=minraw, maxraw=maxraw)
+        self.contexts = FrameContextCache()  # per-frame products shared by their consumers
+        self.frame_seq = 0
+        self.zones = None
+        self.text_sprites = TextSpriteCache(cv.FONT_HERSHEY_DUPLEX, 0.8, 2)
+        self.label_positions = {}
+        self.spots = SpotMeter()
+        self.spot = parse_spot(SPOT)
 
         # -------- PLC SETTING --------
         self.plc_client = ModbusClient("192.168.3.40")
@@ -54,6 +63,8 @@ class ThermalCamera:
             print("Connected to ModbusClient")
         else:
             print("Failed to connect to ModbusClient")
+        self.scheduler = PublishScheduler()
+        self.scheduler.add("temps", SEND_INTERVAL, self.send_temps)
 
         self.frame_queue = Queue(BUF_SIZE)
         # -------- FRAME SETTING --------
@@ -62,10 +73,6 @@ class ThermalCamera:
         cv.setMouseCallback(self.window_name, self.select_point)
         print(f"Starting data collection")
 
-    def apply_zone(self, temp_celsius, zone):
-        comp = self.compensation[zone]
-        return ((temp_celsius - comp["b"]) / comp["m"]) - 9
-
     def text_position(self, x, y, text, frame_width, frame_height):
         text_width = len(text) * 12  
         text_height = 60
@@ -102,6 +109,15 @@ class ThermalCamera:
         return int(text_x), int(text_y)
 
 
+    def label_position(self, point, text, frame_width, frame_height):
+        """text_position, laid out once per point and label"""
+        key = (point, text, frame_width, frame_height)
+        pos = self.label_positions.get(key)
+        if pos is None:
+            pos = self.text_position(point[0], point[1], text, frame_width, frame_height)
+            self.label_positions[key] = pos
+        return pos
+
     def select_point(self, event, x, y, flags, param):
         if event == cv.EVENT_LBUTTONDOWN:
             if self.p1 is None:
@@ -128,10 +144,18 @@ class ThermalCamera:
             else:
                 print("No point to remove")
 
-    def run(self):
-        last_send_time = time.time()
-        send_interval = 1  # seconds
+    def send_temps(self):
+        """Latest averages for all states to ModbusClient / receiver"""
+        if not any(self.avg_temp_send.values()):
+            return
+        latest_temps = {
+            "state1": self.avg_temp_send["state1"][-1] if self.avg_temp_send["state1"] else 0.0,
+            "state2": self.avg_temp_send["state2"][-1] if self.avg_temp_send["state2"] else 0.0,
+            "state3": self.avg_temp_send["state3"][-1] if self.avg_temp_send["state3"] else 0.0,
+        }
+        self.plc_client.receive_temp(latest_temps)
 
+    def run(self):
         while True:
             ret, frame = self.cap.read()
             if not ret:
@@ -148,28 +172,34 @@ class ThermalCamera:
             except Empty:
                 continue
             
-            frame = cv.rotate(frame, cv.ROTATE_90_CLOCKWISE)
-            frame = cv.resize(frame, (720, 640), interpolation=cv.INTER_CUBIC)
+            self.frame_seq += 1
+            native = cv.rotate(frame, cv.ROTATE_90_CLOCKWISE)
+            ctx = self.contexts.get(native, self.frame_seq)
+            if AUTO_RANGE and frame.dtype == np.uint16:
+                # Limits come from the native frame, before resize
+                self.auto_range.update(ctx)
+
+            native_h, native_w = native.shape[:2]
+            frame = cv.resize(native, (720, 640), interpolation=cv.INTER_CUBIC)
             height, width = frame.shape[:2]
 
             if frame.dtype == np.uint16:
-                clipped = np.clip(frame, minraw, maxraw)
-                frame_8 = ((clipped - minraw) / (maxraw - minraw) * 255).astype(np.uint8)
-                thermal_frame = cv.applyColorMap(frame_8, cv.COLORMAP_JET)
+                # Palette, range and isotherms are all baked into the display LUT
+                thermal_frame = self.display.colorize(frame)
 
-                third = width //3
-                cv.line(thermal_frame, (third, 0), (third, height), (255,255,255), 1)
-                cv.line(thermal_frame, (2 * third, 0), (2 * third, height), (255,255,255), 1)
-                cv.putText(thermal_frame, "LEFT", (third //2 - 40, 30), cv.FONT_HERSHEY_PLAIN, 2, (255,255,255), 2)
-                cv.putText(thermal_frame, "MIDDLE", (third + third //2 - 40, 30), cv.FONT_HERSHEY_PLAIN, 2, (255,255,255), 2)
-                cv.putText(thermal_frame, "RIGHT", (2*third + third //2 - 40, 30), cv.FONT_HERSHEY_PLAIN, 2, (255,255,255), 2)
+                # Zone lines and titles are rendered once and composited
+                if self.zones is None or (self.zones.width, self.zones.height) != (width, height):
+                    self.zones = zone_overlay(width, height)
+                self.zones.apply(thermal_frame)
 
                 point_data = [("state1", self.p1, "state1"), ("state2", self.p2, "state2"), ("state3", self.p3, "state3")]
+                if any(point is not None for _, point, _ in point_data):
+                    # Spots are averaged on the native frame, not the upscaled one
+                    self.spots.update(native)
                 for point_name, point, buffer_key in point_data:
                     if point is not None:
                         x, y = point
-                        temp_raw = frame[y, x]
-                        temp_celsius = (temp_raw / 100) - 273.15
+                        temp_raw = round(self.spots.read(x * native_w // width, y * native_h // height, self.spot)[0])
 
                         if x < width //3:
                             zone = "left"
@@ -181,9 +211,7 @@ class ThermalCamera:
                             zone = "right"
                             point_name = "state3"
                         
-                        cal_temp = self.apply_zone(temp_celsius, zone)
-                        self.buffers[buffer_key].append(cal_temp)
-                        avg_temp = sum(self.buffers[buffer_key]) / len(self.buffers[buffer_key])
+                        avg_temp = centi_to_celsius(self.meter.update(buffer_key, temp_raw, zone))
                         avg_temp_data = round(avg_temp, 1) 
                         self.avg_temp_send[buffer_key].append(avg_temp_data)
                         
@@ -192,29 +220,18 @@ class ThermalCamera:
                         text2 = f"{avg_temp:.1f}C"
                         
                         # Get adjusted position for text to stay within frame
-                        x_text, y_text = self.text_position(x, y, text1, width, height)
+                        x_text, y_text = self.label_position(point, text1, width, height)
                         
-                        # Draw the text with adjusted positions
-                        cv.putText(thermal_frame, text1, (x_text, y_text), cv.FONT_HERSHEY_DUPLEX, 0.8, (0, 0, 0), 2)
-                        cv.putText(thermal_frame, text2, (x_text, y_text + 30), cv.FONT_HERSHEY_DUPLEX, 0.8, (0, 0, 0), 2)
+                        # Draw the text with adjusted positions (cached sprites)
+                        self.text_sprites.put_text(thermal_frame, text1, (x_text, y_text), (0, 0, 0))
+                        self.text_sprites.put_text(thermal_frame, text2, (x_text, y_text + 30), (0, 0, 0))
 
                         # Draw the circle
                         cv.circle(thermal_frame, (x, y), 5, (0, 0, 0), -1)
- 
-                        # ------------ SEND DATA TO SendtempTCP.py ------------
-                        current_time = time.time()
-                        if current_time - last_send_time >= send_interval:
-                            last_send_time = current_time
-
-                            # Build latest averages for all states
-                            latest_temps = {
-                                "state1": self.avg_temp_send["state1"][-1] if self.avg_temp_send["state1"] else 0.0,
-                                "state2": self.avg_temp_send["state2"][-1] if self.avg_temp_send["state2"] else 0.0,
-                                "state3": self.avg_temp_send["state3"][-1] if self.avg_temp_send["state3"] else 0.0,
-                            }
-
-                            # Send to ModbusClient / receiver
-                            self.plc_client.receive_temp(latest_temps)
+
+                # ------------ SEND DATA TO SendtempTCP.py ------------
+                # Deadline based, independent of how many points are set
+                self.scheduler.run_pending()
 
                 cv.imshow(self.window_name, thermal_frame)
             else:
@@ -5,6 +5,7 @@ import time
 from collections import deque
 from queue import Queue, Full, Empty
 from SendtempTCP import ModbusClient
+from framecontext import FrameContextCache
 
 # Temperature range
 minraw = 26315  # --> -10 celsius
@@ -22,6 +23,9 @@ class ThermalCamera:
         self.cap.set(cv.CAP_PROP_FPS, 9)
         self.cap.set(cv.CAP_PROP_CONVERT_RGB, 0)
         self.points = []
+        # 8-bit and colorized frames built once per frame (framecontext.py)
+        self.contexts = FrameContextCache(minraw=minraw, maxraw=maxraw)
+        self.frame_seq = 0
 
         self.p1 = None
         self.p2 = None
@@ -154,9 +158,10 @@ class ThermalCamera:
             height, width = frame.shape[:2]
 
             if frame.dtype == np.uint16:
-                clipped = np.clip(frame, minraw, maxraw)
-                frame_8 = ((clipped - minraw) / (maxraw - minraw) * 255).astype(np.uint8)
-                thermal_frame = cv.applyColorMap(frame_8, cv.COLORMAP_JET)
+                self.frame_seq += 1
+                ctx = self.contexts.get(frame, self.frame_seq)
+                # Drawn on below, so a copy: the context's image stays intact
+                thermal_frame = ctx.colorized.copy()
 
                 third = width //3
                 cv.line(thermal_frame, (third, 0), (third, height), (255,255,255), 1)
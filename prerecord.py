@@ -0,0 +1,131 @@
+import os
+import time
+from datetime import datetime
+from queue import Queue
+from threading import Thread
+
+import numpy as np
+
+from lepton import FRAME_SHAPE
+
+PRE_SECONDS = 60
+POST_SECONDS = 10
+FPS = 9
+MARGIN_SECONDS = 10  # ring slack so the writer can copy before frames are overwritten
+CLIP_DIR = "clips"
+NAME_REASONS = 3     # reasons spelled out in a clip's filename, the rest are counted
+
+
+class PreTriggerRecorder:
+    """Last N seconds of raw Y16 frames in a preallocated ring.
+
+    push() is the only per-frame cost: one copy into the next slot. A
+    trigger marks a window of pre + post frames; once the post frames have
+    arrived a background thread copies the window out of the ring and
+    writes it as a compressed .npz clip, so the capture loop never waits
+    on the disk.
+    """
+
+    def __init__(self, pre_seconds=PRE_SECONDS, post_seconds=POST_SECONDS, fps=FPS,
+                 shape=FRAME_SHAPE, directory=CLIP_DIR):
+        self.pre = int(pre_seconds * fps)
+        self.post = int(post_seconds * fps)
+        self.slots = self.pre + self.post + int(MARGIN_SECONDS * fps)
+        self.directory = directory
+
+        self.frames = np.empty((self.slots,) + tuple(shape), dtype=np.uint16)
+        self.times = np.zeros(self.slots)
+        self.seqs = np.full(self.slots, -1, dtype=np.int64)
+        self.seq = -1          # sequence number of the newest frame
+        self.pending = []      # [start, trigger, end, reason], end exclusive
+
+        self.jobs = Queue()
+        self.writer = Thread(target=self._write_loop, daemon=True)
+        self.writer.start()
+
+    def push(self, frame, timestamp=None):
+        """Store one frame, the only copy made on the capture thread"""
+        if frame.shape != self.frames.shape[1:]:
+            return
+        seq = self.seq + 1
+        slot = seq % self.slots
+        # The slot is marked invalid while it is rewritten, the writer
+        # thread checks the seqs before and after its copy (no lock)
+        self.seqs[slot] = -1
+        np.copyto(self.frames[slot], frame)
+        self.times[slot] = time.time() if timestamp is None else timestamp
+        self.seqs[slot] = seq
+        self.seq = seq
+
+        while self.pending and self.pending[0][2] <= seq + 1:
+            self.jobs.put(tuple(self.pending.pop(0)))
+
+    def trigger(self, reason="trigger"):
+        """Save the pre-trigger window and the next post_seconds of frames"""
+        trigger = self.seq
+        start = max(trigger - self.pre + 1, 0)
+        end = trigger + self.post + 1
+        if self.pending and start <= self.pending[-1][2]:
+            # Overlapping triggers make one longer clip
+            self.pending[-1][2] = end
+            if reason not in self.pending[-1][3].split("+"):
+                self.pending[-1][3] += f"+{reason}"
+        else:
+            self.pending.append([start, trigger, end, reason])
+
+    def close(self):
+        """Write pending clips with whatever post frames exist, then stop"""
+        for start, trigger, end, reason in self.pending:
+            self.jobs.put((start, trigger, min(end, self.seq + 1), reason))
+        self.pending = []
+        self.jobs.put(None)
+        self.writer.join()
+
+    # -------- WRITER THREAD --------
+    def _copy_window(self, start, end):
+        """Frames start..end-1 still in the ring (older ones may be overwritten)"""
+        seqs = np.arange(start, end)
+        slots = seqs % self.slots
+        before = self.seqs[slots]
+        frames = self.frames[slots]
+        times = self.times[slots]
+        kept = (before == seqs) & (self.seqs[slots] == seqs)
+        return frames[kept], times[kept], seqs[kept]
+
+    def _write_loop(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            start, trigger, end, reason = job
+            try:
+                frames, times, seqs = self._copy_window(start, end)
+                if len(frames) == 0:
+                    continue
+                if seqs[0] != start:
+                    print(f"Clip {reason}: {seqs[0] - start} oldest frames were overwritten")
+                # First frame at or after the trigger, the last one if it was overwritten too
+                trigger_index = min(int(np.searchsorted(seqs, trigger)), len(seqs) - 1)
+                self._save(frames, times, trigger_index, reason)
+            except Exception as e:
+                # One failed clip must not stop the writer
+                print(f"Clip {reason}: not saved ({e})")
+
+    def _save(self, frames, times, trigger_index, reason):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.fromtimestamp(times[trigger_index]).strftime("%Y%m%d_%H%M%S")
+        reasons = reason.split("+")
+        if len(reasons) > NAME_REASONS:
+            reasons = reasons[:NAME_REASONS] + [f"{len(reasons) - NAME_REASONS}more"]
+        safe = "".join(c if c.isalnum() or c in "+-_" else "_" for c in "+".join(reasons))[:120]
+        path = os.path.join(self.directory, f"{stamp}_{safe}.npz")
+        np.savez_compressed(path, frames=frames, times=times,
+                            trigger_index=trigger_index, reason=reason)
+        print(f"Saved clip {path} ({len(frames)} frames)")
+        return path
+
+
+def load_clip(path):
+    """-> (frames, times, trigger_index, reason)"""
+    with np.load(path) as clip:
+        return clip["frames"], clip["times"], int(clip["trigger_index"]), str(clip["reason"])
@@ -0,0 +1,106 @@
+from threading import Lock
+
+from PySide6.QtCore import QObject, QThread, QSocketNotifier, Signal
+
+
+class CaptureThread(QThread):
+    """Reads the capture in a worker thread and signals each new frame.
+
+    cap.read() blocks until the camera delivers, so the GUI is woken
+    exactly once per frame. Only the newest frame is kept: if the GUI is
+    still busy, the next frame replaces it instead of queueing signals.
+    """
+
+    frame_ready = Signal()
+    failed = Signal()
+
+    def __init__(self, cap, parent=None):
+        super().__init__(parent)
+        self.cap = cap
+        self._lock = Lock()
+        self._latest = None
+        self._exited = False
+        self._release_on_exit = False
+
+    def run(self):
+        try:
+            while not self.isInterruptionRequested():
+                ret, frame = self.cap.read()
+                if not ret:
+                    self.failed.emit()
+                    return
+                with self._lock:
+                    pending = self._latest is not None
+                    self._latest = frame
+                if not pending:
+                    self.frame_ready.emit()
+        finally:
+            with self._lock:
+                self._exited = True
+                release = self._release_on_exit
+            if release:
+                self.cap.release()
+
+    def take(self):
+        """Newest frame (None if already taken)"""
+        with self._lock:
+            frame, self._latest = self._latest, None
+        return frame
+
+    def stop(self):
+        """True if the thread has exited and the caller may release the capture.
+
+        If it is still blocked in read() after the timeout, it releases
+        the capture itself when read() returns.
+        """
+        self.requestInterruption()
+        self.wait(2000)
+        with self._lock:
+            self._release_on_exit = not self._exited
+            return self._exited
+
+
+class NotifierCapture(QObject):
+    """Same interface for captures with a readable fd (framebroker.BrokerCapture).
+
+    A QSocketNotifier fires in the GUI thread when the broker announces a
+    frame, no extra thread is needed.
+    """
+
+    frame_ready = Signal()
+    failed = Signal()
+
+    def __init__(self, cap, parent=None):
+        super().__init__(parent)
+        self.cap = cap
+        self._latest = None
+        self.notifier = QSocketNotifier(cap.fileno(), QSocketNotifier.Read, self)
+        self.notifier.setEnabled(False)
+        self.notifier.activated.connect(self._on_readable)
+
+    def start(self):
+        self.notifier.setEnabled(True)
+
+    def _on_readable(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            self.notifier.setEnabled(False)
+            self.failed.emit()
+            return
+        self._latest = frame
+        self.frame_ready.emit()
+
+    def take(self):
+        frame, self._latest = self._latest, None
+        return frame
+
+    def stop(self):
+        self.notifier.setEnabled(False)
+        return True
+
+
+def frame_signals(cap, parent=None):
+    """Event source for a capture: fd notifier when possible, else a thread"""
+    if hasattr(cap, "fileno"):
+        return NotifierCapture(cap, parent)
+    return CaptureThread(cap, parent)
@@ -0,0 +1,98 @@
+import numpy as np
+
+# kind -> (big-endian dtype of one value, words per value)
+_KINDS = {
+    "float32": (">f4", 2),
+    "int32": (">i4", 2),
+    "int16": (">i2", 1),
+}
+
+
+class RegisterCodec:
+    """Values <-> 16-bit PLC registers for a whole block in one numpy pass.
+
+    kind: "float32", or "int32"/"int16" holding value * scale, rounded and
+    saturated. NaN (no value) stays NaN in float32; the integer kinds hold it
+    as their minimum (-32768 for int16), which saturation stops short of,
+    and decode it back to NaN. word_swap puts the low word first (what our PLCs expect for
+    32-bit values), byte_swap swaps the two bytes inside every register.
+    Buffers are allocated once per block size and reused.
+    """
+
+    def __init__(self, kind="float32", scale=1.0, word_swap=True, byte_swap=False):
+        if kind not in _KINDS:
+            raise ValueError(f"Unknown register kind {kind!r}")
+        self.kind = kind
+        self.dtype, self.words_per_value = _KINDS[kind]
+        self.scale = scale
+        self.word_swap = word_swap and self.words_per_value == 2
+        self.byte_swap = byte_swap
+        self._values = None
+        self._words = None
+
+    def _buffers(self, n):
+        if self._values is None or self._values.size != n:
+            self._values = np.empty(n, dtype=self.dtype)
+            self._words = np.empty(n * self.words_per_value, dtype=np.uint16)
+        return self._values, self._words
+
+    def encode(self, values, out=None):
+        """Array of n values -> uint16 array of n * words_per_value registers.
+
+        The returned array is the codec's reused buffer unless `out` is
+        given (e.g. a slice of a larger register block).
+        """
+        values = np.asarray(values, dtype=np.float64)
+        staged, words = self._buffers(values.size)
+        if self.kind == "float32":
+            staged[:] = values
+        else:
+            info = np.iinfo(staged.dtype)
+            scaled = np.rint(values * self.scale)
+            np.clip(scaled, info.min + 1, info.max, out=scaled)
+            scaled[np.isnan(scaled)] = info.min
+            staged[:] = scaled
+
+        # big-endian bytes viewed as big-endian words: high word first
+        regs = staged.view(">u2").reshape(values.size, self.words_per_value)
+        if self.word_swap:
+            regs = regs[:, ::-1]
+        if out is None:
+            out = words
+        out = out.reshape(values.size, self.words_per_value)
+        out[:] = regs
+        if self.byte_swap:
+            out.byteswap(inplace=True)
+        return out.reshape(-1)
+
+    def decode(self, registers):
+        """Registers (ints) -> float64 values, the inverse of encode()"""
+        regs = np.asarray(registers, dtype=np.uint16).reshape(-1, self.words_per_value)
+        if self.byte_swap:
+            regs = regs.byteswap()
+        if self.word_swap:
+            regs = regs[:, ::-1]
+        values = np.ascontiguousarray(regs).astype(">u2").view(self.dtype).reshape(-1)
+        if self.kind == "float32":
+            return values.astype(np.float64)
+        return np.where(values == np.iinfo(values.dtype).min, np.nan, values / self.scale)
+
+
+def register_runs(writes):
+    """(address, registers) writes -> the fewest writes, adjacent ones joined.
+
+    Only registers that have a value are written: a gap splits the run
+    instead of being filled, so nothing else at those addresses is touched.
+    """
+    runs = []
+    for address, regs in sorted(writes, key=lambda w: w[0]):
+        if runs and runs[-1][0] + len(runs[-1][1]) == address:
+            runs[-1][1].extend(regs)
+        else:
+            runs.append((address, list(regs)))
+    return runs
+
+
+def as_signed(registers):
+    """uint16 registers -> signed ints, for clients that pack words as int16"""
+    return np.asarray(registers, dtype=np.uint16).view(np.int16).tolist()
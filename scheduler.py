@@ -0,0 +1,71 @@
+import time
+
+
+class Job:
+    def __init__(self, name, interval, callback, start):
+        self.name = name
+        self.interval = interval
+        self.callback = callback
+        self.deadline = start
+        self.runs = 0
+        self.misses = 0          # deadlines skipped because we were late
+        self.max_lateness = 0.0  # seconds
+        self.last_lateness = 0.0
+
+
+class PublishScheduler:
+    """Runs publish jobs on monotonic-clock deadlines, each at its own rate.
+
+    Deadlines are start + n * interval, never "last run + interval", so a
+    job does not drift however late its callbacks run. When a job is more
+    than one interval late, the missed deadlines are counted and skipped:
+    it runs once and resumes on its grid instead of bursting.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.jobs = {}
+
+    def add(self, name, interval, callback, delay=0.0):
+        job = Job(name, interval, callback, self.clock() + delay)
+        self.jobs[name] = job
+        return job
+
+    def remove(self, name):
+        self.jobs.pop(name, None)
+
+    def next_deadline(self):
+        return min((job.deadline for job in self.jobs.values()), default=None)
+
+    def run_pending(self):
+        """Run every due job once; returns seconds until the next deadline"""
+        for job in list(self.jobs.values()):
+            now = self.clock()
+            if now < job.deadline:
+                continue
+            lateness = now - job.deadline
+            missed = int(lateness // job.interval)
+            job.misses += missed
+            job.deadline += (missed + 1) * job.interval
+            job.last_lateness = lateness
+            job.max_lateness = max(job.max_lateness, lateness)
+            job.runs += 1
+            try:
+                job.callback()
+            except Exception as e:
+                print(f"Publish job {job.name} failed: {e}")
+        deadline = self.next_deadline()
+        return None if deadline is None else max(deadline - self.clock(), 0.0)
+
+    def run_forever(self, stop):
+        """Worker loop for a thread, stop is a threading.Event"""
+        while not stop.is_set():
+            wait = self.run_pending()
+            stop.wait(1.0 if wait is None else wait)
+
+    def stats(self):
+        """Per-job runs, missed deadlines and lateness (ms), for logs and the PLC"""
+        return {name: {"runs": job.runs, "misses": job.misses,
+                       "last_late_ms": round(job.last_lateness * 1000, 1),
+                       "max_late_ms": round(job.max_lateness * 1000, 1)}
+                for name, job in self.jobs.items()}
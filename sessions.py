@@ -0,0 +1,114 @@
+import os
+import re
+
+import numpy as np
+
+from prerecord import FPS, load_clip
+
+
+def _natural_key(name):
+    """thermal_raw_frame_9.npy sorts before thermal_raw_frame_10.npy"""
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+class Session:
+    """Recorded raw Y16 frames, read by frame index without loading it whole.
+
+    `path` is one recording or a directory of them, in filename order:
+    single-frame .npy snapshots ("s" in distrotion .py), (T, H, W) .npy
+    stacks (memory-mapped) or prerecord.py .npz clips. Clips are
+    decompressed when first touched and the last one stays cached.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.isdir(path):
+            names = sorted((n for n in os.listdir(path) if n.endswith((".npy", ".npz"))), key=_natural_key)
+            files = [os.path.join(path, n) for n in names]
+        else:
+            files = [path]
+        if not files:
+            raise ValueError(f"No .npy/.npz recordings in {path}")
+
+        self.files = []
+        counts = []
+        shape = None
+        for file in files:
+            count, frame_shape = self._probe(file)
+            if shape is None:
+                shape = frame_shape
+            elif frame_shape != shape:
+                print(f"Skipping {file}: frames are {frame_shape}, session is {shape}")
+                continue
+            self.files.append(file)
+            counts.append(count)
+        self.shape = shape
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self._cached = (None, None, None)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __getstate__(self):
+        # Sent to worker processes without the cached (memory-mapped) file
+        state = self.__dict__.copy()
+        state["_cached"] = (None, None, None)
+        return state
+
+    @staticmethod
+    def _probe(file):
+        """-> (frame count, frame shape) from the headers only"""
+        if file.endswith(".npz"):
+            with np.load(file) as clip:
+                # .npz members are .npy files, read just the header
+                with clip.zip.open("frames.npy") as member:
+                    if np.lib.format.read_magic(member) == (1, 0):
+                        shape = np.lib.format.read_array_header_1_0(member)[0]
+                    else:
+                        shape = np.lib.format.read_array_header_2_0(member)[0]
+        else:
+            shape = np.load(file, mmap_mode="r").shape
+        if len(shape) == 2:
+            return 1, tuple(shape)
+        return shape[0], tuple(shape[1:])
+
+    def _load(self, i):
+        """-> (frames, times) of file i, frames memory-mapped when possible"""
+        if self._cached[0] == i:
+            return self._cached[1:]
+        file = self.files[i]
+        if file.endswith(".npz"):
+            frames, times, _, _ = load_clip(file)
+        else:
+            frames = np.load(file, mmap_mode="r")
+            mtime = os.path.getmtime(file)
+            if frames.ndim == 2:
+                frames = frames[None]
+            # Stacks carry no timestamps, assume FPS up to the file time
+            times = mtime - (len(frames) - 1 - np.arange(len(frames))) / FPS
+        self._cached = (i, frames, times)
+        return frames, times
+
+    def read(self, start, stop):
+        """Frames start..stop-1 -> (times (n,), frames (n, H, W) uint16)"""
+        start, stop = max(start, 0), min(stop, len(self))
+        frames = np.empty((max(stop - start, 0),) + self.shape, dtype=np.uint16)
+        times = np.empty(len(frames))
+        i = int(np.searchsorted(self.offsets, start, side="right")) - 1
+        pos = start
+        while pos < stop:
+            file_frames, file_times = self._load(i)
+            lo = pos - self.offsets[i]
+            hi = min(stop, self.offsets[i + 1]) - self.offsets[i]
+            frames[pos - start:pos - start + hi - lo] = file_frames[lo:hi]
+            times[pos - start:pos - start + hi - lo] = file_times[lo:hi]
+            pos += hi - lo
+            i += 1
+        return times, frames
+
+    def chunks(self, size, start=0, stop=None):
+        """(first index, times, frames) blocks of up to `size` frames"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for first in range(start, stop, size):
+            times, frames = self.read(first, min(first + size, stop))
+            yield first, times, frames
@@ -0,0 +1,89 @@
+import cv2 as cv
+import numpy as np
+
+DEFAULT_SPOT = "3x3"
+
+
+class Spot:
+    """Measurement area around a point: an odd box side or a circle radius"""
+
+    def __init__(self, kind="box", size=1):
+        if kind not in ("box", "circle"):
+            raise ValueError(f"Unknown spot kind {kind!r}")
+        self.kind = kind
+        self.size = size
+        if kind == "box":
+            half = size // 2
+            self.dy = np.array([0])
+            self.half_height = half
+            self.half_widths = np.array([half])
+        else:
+            # One span per row, each span summed in O(1) from the integral
+            self.dy = np.arange(-size, size + 1)
+            self.half_height = 0
+            self.half_widths = np.floor(np.sqrt(size * size - self.dy * self.dy)).astype(int)
+
+    def __repr__(self):
+        return f"r{self.size}" if self.kind == "circle" else f"{self.size}x{self.size}"
+
+
+def parse_spot(text):
+    """"1", "3x3", "5x5" or "r<radius>" -> Spot"""
+    text = text.strip().lower()
+    if text.startswith("r"):
+        radius = int(text[1:])
+        if radius < 0:
+            raise ValueError(f"Spot radius must be >= 0, got {radius}")
+        return Spot("circle", radius)
+    side = int(text.split("x")[0])
+    if side < 1 or side % 2 == 0:
+        raise ValueError(f"Spot side must be odd, got {side}")
+    return Spot("box", side)
+
+
+class SpotMeter:
+    """Mean and standard deviation of raw values over spots, from integral images.
+
+    update() computes one sum and one sum-of-squares integral per native
+    frame; every spot afterwards is a handful of lookups whatever its size,
+    and all points of a frame are measured in one vectorized call.
+    """
+
+    def __init__(self):
+        self.sum = None
+        self.sqsum = None
+        self.shape = None
+
+    def update(self, native):
+        # float64 holds the integer sums of a whole Y16 frame exactly
+        self.sum, self.sqsum = cv.integral2(native, sdepth=cv.CV_64F, sqdepth=cv.CV_64F)
+        self.shape = native.shape[:2]
+
+    def measure(self, xs, ys, spot):
+        """Arrays of native x, y -> (mean, std) arrays in raw units"""
+        h, w = self.shape
+        xs = np.asarray(xs)[:, None]
+        ys = np.asarray(ys)[:, None]
+
+        y0 = np.clip(ys + spot.dy - spot.half_height, 0, h)
+        y1 = np.clip(ys + spot.dy + spot.half_height + 1, 0, h)
+        x0 = np.clip(xs - spot.half_widths, 0, w)
+        x1 = np.clip(xs + spot.half_widths + 1, 0, w)
+
+        count = ((y1 - y0) * (x1 - x0)).sum(axis=1)
+        total = self._rects(self.sum, y0, y1, x0, x1)
+        squares = self._rects(self.sqsum, y0, y1, x0, x1)
+
+        count = np.maximum(count, 1)
+        mean = total / count
+        std = np.sqrt(np.maximum(squares / count - mean * mean, 0))
+        return mean, std
+
+    def read(self, x, y, spot):
+        """Single point convenience: (mean, std)"""
+        mean, std = self.measure([x], [y], spot)
+        return float(mean[0]), float(std[0])
+
+    @staticmethod
+    def _rects(table, y0, y1, x0, x1):
+        return (table[y1, x1] - table[y0, x1] - table[y1, x0] + table[y0, x0]).sum(axis=1)
@@ -0,0 +1,66 @@
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from framering import SharedFrameRing
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Owner and a forked reader share one resource tracker; the tracker
+# reports its mistakes on stderr when the owner exits
+_FORKED_READER = """
+import multiprocessing as mp, os
+import numpy as np
+from framering import SharedFrameRing
+
+def reader(name):
+    ring = SharedFrameRing(name)
+    seq, frame = ring.read_latest()
+    assert seq == 1 and frame[0, 0] == 7
+    ring.close()
+
+if __name__ == "__main__":
+    ring = SharedFrameRing(create=True)
+    ring.write(np.full((120, 160), 7, np.uint16))
+    p = mp.get_context("fork").Process(target=reader, args=(ring.name,))
+    p.start()
+    p.join()
+    assert p.exitcode == 0
+    name = ring.name
+    ring.close()
+    print(os.path.exists("/dev/shm/" + name.lstrip("/")))
+"""
+
+
+def test_forked_reader_keeps_owner_tracking():
+    result = subprocess.run([sys.executable, "-c", _FORKED_READER], cwd=_ROOT,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "False"  # unlinked by the owner
+    assert result.stderr == ""              # no tracker KeyError or leak warning
+
+
+def _read_and_close(name, q):
+    ring = SharedFrameRing(name)
+    q.put(int(ring.read_latest()[1][0, 0]))
+    ring.close()
+
+
+def test_block_survives_forked_reader_exit():
+    ring = SharedFrameRing(create=True)
+    try:
+        ring.write(np.full((120, 160), 3, np.uint16))
+        q = mp.get_context("fork").Queue()
+        p = mp.get_context("fork").Process(target=_read_and_close, args=(ring.name, q))
+        p.start()
+        assert q.get(timeout=10) == 3
+        p.join()
+        # Still readable by the owner and by a new reader
+        again = SharedFrameRing(ring.name)
+        assert again.read_latest()[1][0, 0] == 3
+        again.close()
+    finally:
+        ring.close()
@@ -0,0 +1,41 @@
+import math
+
+import numpy as np
+
+from fixedpoint import celsius_to_raw
+from hotspots import MAX_MISSED, HotspotTracker
+from regcodec import RegisterCodec
+
+
+def _frame(hot=True):
+    frame = np.full((160, 120), celsius_to_raw(25), np.uint16)
+    if hot:
+        frame[40:46, 60:66] = celsius_to_raw(80)
+    return frame
+
+
+def test_dropped_hotspot_leaves_slot_vacant():
+    tracker = HotspotTracker(k=2)
+    spots = tracker.update(_frame())
+    assert list(spots) == ["hot1"]
+    assert spots["hot1"]["temp"] > 70
+    assert tracker.vacant() == ["hot2"]
+
+    # Missed frames coast on the tracked hotspot, then it is dropped
+    for _ in range(MAX_MISSED):
+        assert tracker.update(_frame(hot=False)) == {}
+        assert tracker.vacant() == ["hot2"]
+    assert tracker.update(_frame(hot=False)) == {}
+    assert tracker.vacant() == ["hot1", "hot2"]
+
+
+def test_vacant_slot_encodes_as_no_value():
+    # What the GUIs and headless publish for a vacant slot
+    floats = RegisterCodec("float32", word_swap=True)
+    assert math.isnan(floats.decode(floats.encode([math.nan]))[0])
+
+    centi = RegisterCodec("int16", scale=100)
+    regs = centi.encode([math.nan, -400.0, 21.5])
+    assert regs.view(np.int16).tolist() == [-32768, -32767, 2150]
+    values = centi.decode(regs)
+    assert math.isnan(values[0]) and values[1:].tolist() == [-327.67, 21.5]
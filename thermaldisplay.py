@@ -0,0 +1,128 @@
+import cv2 as cv
+import numpy as np
+
+from fixedpoint import celsius_to_raw
+from lepton import raw_to_celsius
+
+# Ironbow control points, RGB from cold to hot
+_IRONBOW = [
+    (0.00, (0, 0, 0)),
+    (0.15, (32, 0, 140)),
+    (0.40, (180, 0, 150)),
+    (0.65, (255, 100, 0)),
+    (0.85, (255, 200, 40)),
+    (1.00, (255, 255, 255)),
+]
+
+PALETTES = ["jet", "inferno", "ironbow", "grayscale"]
+_OPENCV_MAPS = {"jet": cv.COLORMAP_JET, "inferno": cv.COLORMAP_INFERNO}
+
+
+def palette_colors(name):
+    """(256, 3) BGR colors of a palette"""
+    ramp = np.arange(256, dtype=np.uint8)
+    if name in _OPENCV_MAPS:
+        return cv.applyColorMap(ramp.reshape(-1, 1), _OPENCV_MAPS[name]).reshape(256, 3)
+    if name == "grayscale":
+        return np.repeat(ramp[:, None], 3, axis=1)
+    if name == "ironbow":
+        pos = [p for p, _ in _IRONBOW]
+        x = np.linspace(0, 1, 256)
+        rgb = np.stack([np.interp(x, pos, [c[i] for _, c in _IRONBOW]) for i in range(3)], axis=1)
+        return rgb[:, ::-1].round().astype(np.uint8)
+    raise ValueError(f"Unknown palette: {name}")
+
+
+class DisplayEngine:
+    """Raw Y16 -> BGR rendering through one precomputed 65536-entry LUT.
+
+    Palette, display range, isotherm band and above/below-threshold colors
+    are all baked into the LUT, and the color bar is rendered once per
+    change, so every mode costs the same single gather per frame.
+    """
+
+    def __init__(self, palette="jet", minraw=26315, maxraw=42315, bar_width=180):
+        self.palette = palette
+        self.minraw = minraw
+        self.maxraw = maxraw
+        self.bar_width = bar_width
+        self.isotherm = None  # (low C, high C, BGR)
+        self.above = None     # (threshold C, BGR)
+        self.below = None     # (threshold C, BGR)
+
+        self.lut = None
+        self.version = 0
+        self._bar_key = None
+        self._combined = None
+        self.build()
+
+    # -------- SETTINGS --------
+    def set_palette(self, palette):
+        if palette != self.palette:
+            self.palette = palette
+            self.build()
+
+    def set_range(self, minraw, maxraw):
+        if (minraw, maxraw) != (self.minraw, self.maxraw):
+            self.minraw, self.maxraw = minraw, maxraw
+            self.build()
+
+    def set_isotherm(self, low_celsius=None, high_celsius=None, color=(0, 255, 0)):
+        self.isotherm = None if low_celsius is None else (low_celsius, high_celsius, color)
+        self.build()
+
+    def set_threshold_colors(self, above=None, below=None):
+        """above/below: (threshold Celsius, BGR) or None"""
+        self.above = above
+        self.below = below
+        self.build()
+
+    def build(self):
+        raw = np.arange(65536, dtype=np.float32)
+        span = max(self.maxraw - self.minraw, 1)
+        index = (np.clip(raw, self.minraw, self.maxraw) - self.minraw) / span * 255
+        lut = palette_colors(self.palette)[index.astype(np.uint8)]
+
+        if self.below is not None:
+            lut[:celsius_to_raw(self.below[0])] = self.below[1]
+        if self.above is not None:
+            lut[celsius_to_raw(self.above[0]):] = self.above[1]
+        if self.isotherm is not None:
+            low, high, color = self.isotherm
+            lut[celsius_to_raw(low):celsius_to_raw(high) + 1] = color
+
+        self.lut = lut
+        self.version += 1
+
+    # -------- RENDERING --------
+    def colorize(self, frame, out=None):
+        """Raw uint16 frame (any size) -> BGR"""
+        return np.take(self.lut, frame, axis=0, out=out)
+
+    def _render_bar(self, height):
+        """Gradient of the current LUT plus MAX/MIN labels"""
+        panel = np.zeros((height, self.bar_width, 3), dtype=np.uint8)
+        raw = np.linspace(self.maxraw, self.minraw, height).astype(np.uint16)
+        panel[:, :50] = self.lut[raw][:, None, :]
+
+        font = cv.FONT_HERSHEY_SIMPLEX
+        max_text = f"MAX: {raw_to_celsius(self.maxraw):.0f} Celsius"
+        min_text = f"MIN: {raw_to_celsius(self.minraw):.0f} Celsius"
+        cv.putText(panel, max_text, (55, 20), font, 0.4, (255, 255, 255), 1)
+        cv.putText(panel, min_text, (55, height - 10), font, 0.4, (255, 255, 255), 1)
+        return panel
+
+    def compose(self, thermal_frame):
+        """Thermal frame with the color bar on its right.
+
+        Returns a reused buffer: the bar is only redrawn when the LUT or the
+        frame size changed, otherwise this is one slice copy.
+        """
+        h, w = thermal_frame.shape[:2]
+        key = (self.version, h, w)
+        if key != self._bar_key:
+            self._combined = np.zeros((h, w + self.bar_width, 3), dtype=np.uint8)
+            self._combined[:, w:] = self._render_bar(h)
+            self._bar_key = key
+        self._combined[:, :w] = thermal_frame
+        return self._combined
@@ -0,0 +1,137 @@
+import numpy as np
+from PySide6.QtCore import Qt, QRect, QSize, Signal
+from PySide6.QtGui import QImage, QPainter, QColor, QFont
+from PySide6.QtWidgets import QWidget, QSizePolicy
+
+
+class ThermalVideoWidget(QWidget):
+    """Paints native-resolution frames, scaled by Qt once in paintEvent.
+
+    Frames are BGR888 or indexed-8 (palette as color table) and are copied
+    into a reused backing buffer that a QImage wraps without conversion.
+    An optional premultiplied RGBA overlay at the logical display size is
+    drawn on top.
+    Coordinates exchanged with the rest of the GUI are logical ones, i.e.
+    pixels of a `logical_size` image, whatever the widget size is.
+    """
+
+    clicked = Signal(int, int, object)  # logical x, y, Qt.MouseButton
+    hovered = Signal(int, int)          # logical x, y; -1, -1 when the cursor leaves
+
+    def __init__(self, logical_size=(720, 640), parent=None):
+        super().__init__(parent)
+        self.logical_size = logical_size
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setAttribute(Qt.WA_OpaquePaintEvent, False)
+
+        self._buffer = None
+        self._image = None
+        self._color_table = None
+        self._overlay_buffer = None
+        self._overlay = None
+        self._readout = None
+
+        self.setMouseTracking(True)
+        self.readout_font = QFont("Poppins", 14, QFont.Weight.Medium)
+
+    def sizeHint(self):
+        return QSize(*self.logical_size)
+
+    def has_frame(self):
+        return self._image is not None
+
+    # -------- FRAMES --------
+    def _backing(self, frame, fmt):
+        """Copy into the backing buffer, reallocating only on shape/format change"""
+        if (self._buffer is None or self._buffer.shape != frame.shape
+                or self._image.format() != fmt):
+            self._buffer = np.empty(frame.shape, dtype=np.uint8)
+            h, w = frame.shape[:2]
+            self._image = QImage(self._buffer.data, w, h, self._buffer.strides[0], fmt)
+            self._color_table = None
+        np.copyto(self._buffer, frame)
+
+    def set_bgr(self, frame):
+        self._backing(frame, QImage.Format_BGR888)
+        self.update()
+
+    def set_indexed(self, frame_8, colors):
+        """frame_8: uint8 indices, colors: (256, 3) BGR palette"""
+        self._backing(frame_8, QImage.Format_Indexed8)
+        if self._color_table is not colors:
+            self._image.setColorTable([QColor(int(r), int(g), int(b)).rgb() for b, g, r in colors])
+            self._color_table = colors
+        self.update()
+
+    def set_overlay(self, rgba):
+        """RGBA overlay at the logical size, wrapped once and reused"""
+        if rgba is None:
+            self._overlay = self._overlay_buffer = None
+        elif rgba is not self._overlay_buffer:
+            h, w = rgba.shape[:2]
+            self._overlay_buffer = rgba
+            # The layer is premultiplied: color is blended into transparent
+            # pixels (OverlayCompositor, TextSpriteCache), so RGB already
+            # carries the alpha
+            self._overlay = QImage(rgba.data, w, h, rgba.strides[0], QImage.Format_RGBA8888_Premultiplied)
+        self.update()
+
+    def set_readout(self, text):
+        """Hover text in the bottom-left corner, only that region repaints"""
+        if text == self._readout:
+            return
+        self._readout = text
+        self.update(self.readout_rect())
+
+    # -------- GEOMETRY --------
+    def target_rect(self):
+        """Where the logical image is drawn, keeping its aspect ratio"""
+        lw, lh = self.logical_size
+        scale = min(self.width() / lw, self.height() / lh)
+        w, h = int(lw * scale), int(lh * scale)
+        return QRect((self.width() - w) // 2, (self.height() - h) // 2, w, h)
+
+    def readout_rect(self):
+        rect = self.target_rect()
+        return QRect(rect.x() + 10, rect.bottom() - 40, 300, 32)
+
+    def map_to_logical(self, pos):
+        rect = self.target_rect()
+        if rect.width() == 0 or not rect.contains(pos.toPoint()):
+            return None
+        lw, lh = self.logical_size
+        x = int((pos.x() - rect.x()) * lw / rect.width())
+        y = int((pos.y() - rect.y()) * lh / rect.height())
+        return max(0, min(x, lw - 1)), max(0, min(y, lh - 1))
+
+    # -------- EVENTS --------
+    def mousePressEvent(self, event):
+        mapped = self.map_to_logical(event.position())
+        if mapped is not None:
+            self.clicked.emit(mapped[0], mapped[1], event.button())
+
+    def mouseMoveEvent(self, event):
+        mapped = self.map_to_logical(event.position())
+        if mapped is None:
+            self.hovered.emit(-1, -1)
+        else:
+            self.hovered.emit(*mapped)
+
+    def leaveEvent(self, event):
+        self.hovered.emit(-1, -1)
+
+    def paintEvent(self, event):
+        if self._image is None:
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        rect = self.target_rect()
+        painter.drawImage(rect, self._image)
+        if self._overlay is not None:
+            painter.drawImage(rect, self._overlay)
+        if self._readout:
+            box = self.readout_rect()
+            painter.fillRect(box, QColor(0, 0, 0, 160))
+            painter.setPen(QColor(255, 255, 255))
+            painter.setFont(self.readout_font)
+            painter.drawText(box, Qt.AlignCenter, self._readout)
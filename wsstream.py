@@ -0,0 +1,256 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+import threading
+import time
+import zlib
+
+import cv2 as cv
+import numpy as np
+
+from framebroker import open_frame_source
+from lepton import ROTATION
+
+KEY_INTERVAL = 30   # frames between periodic keyframes
+CLIENT_QUEUE = 2    # frames buffered per client before dropping
+ZLIB_LEVEL = 1
+REOPEN_AFTER = 20   # failed reads (0.1 s apart) before the source is reopened
+MAX_REOPENS = 5     # reopens without a single frame before giving up
+
+KEYFRAME = 0
+DELTA = 1
+# magic, kind, seq, width, height
+HEADER = struct.Struct("<4sBIHH")
+MAGIC = b"TY16"
+
+_WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_VIEWER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "wsviewer.html")
+
+
+class FrameEncoder:
+    """Raw Y16 frames -> keyframe or delta messages, zlib compressed.
+
+    Deltas are frame - previous frame in wrapping uint16 arithmetic, which
+    is mostly zeros and tiny values on a thermal scene and compresses well.
+    """
+
+    def __init__(self, key_interval=KEY_INTERVAL):
+        self.key_interval = key_interval
+        self.prev = None
+        self.delta = None
+        self.since_key = 0
+
+    def encode(self, seq, frame):
+        """Next message of the shared stream, a delta unless a keyframe is due"""
+        key = (self.prev is None or self.prev.shape != frame.shape
+               or self.since_key >= self.key_interval)
+        if key:
+            payload = frame
+            self.since_key = 0
+            self.delta = np.empty_like(frame)
+        else:
+            np.subtract(frame, self.prev, out=self.delta)
+            payload = self.delta
+            self.since_key += 1
+        self.prev = frame.copy()
+        return key, self._message(KEYFRAME if key else DELTA, seq, payload)
+
+    def keyframe(self, seq, frame):
+        """Standalone keyframe of a frame, for clients joining or resyncing.
+
+        The shared delta chain is not touched: the next delta applies on
+        top of this keyframe as well.
+        """
+        return self._message(KEYFRAME, seq, frame)
+
+    @staticmethod
+    def _message(kind, seq, payload):
+        h, w = payload.shape
+        body = zlib.compress(payload.astype("<u2", copy=False).tobytes(), ZLIB_LEVEL)
+        return HEADER.pack(MAGIC, kind, seq & 0xFFFFFFFF, w, h) + body
+
+
+def ws_frame(payload, opcode=0x2):
+    """Unmasked server-to-client WebSocket frame"""
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 65536:
+        head = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return head + payload
+
+
+class Client:
+    def __init__(self, writer):
+        self.writer = writer
+        self.queue = asyncio.Queue(CLIENT_QUEUE)
+        self.synced = False  # has a keyframe to apply deltas to
+
+    def offer(self, key, message):
+        """Queue a frame, dropping it (and the delta chain) if the client lags"""
+        if not self.synced and not key:
+            return
+        if self.queue.full():
+            self.synced = False
+            return
+        self.synced = True
+        self.queue.put_nowait(message)
+
+
+class StreamServer:
+    """Shares one encoded stream with every WebSocket client.
+
+    Each frame is encoded once as the shared delta stream. A client that
+    joins or cannot keep up loses frames and gets a keyframe of the next
+    one, encoded only while some client needs it; synced clients keep
+    receiving deltas and nobody buffers without limit.
+    """
+
+    def __init__(self):
+        self.encoder = FrameEncoder()
+        self.clients = set()
+        self.frames_sent = 0
+        self.bytes_sent = 0
+
+    def publish(self, seq, frame):
+        """Called on the event loop thread for every captured frame"""
+        if not self.clients:
+            self.encoder.prev = None
+            return
+        key, message = self.encoder.encode(seq, frame)
+        data = ws_frame(message)
+        key_data = data if key else None
+        for client in self.clients:
+            if client.synced:
+                client.offer(key, data)
+                continue
+            if key_data is None:
+                key_data = ws_frame(self.encoder.keyframe(seq, frame))
+            client.offer(True, key_data)
+
+    async def handle(self, reader, writer):
+        request = await reader.readuntil(b"\r\n\r\n")
+        lines = request.decode("latin-1").split("\r\n")
+        headers = {k.strip().lower(): v.strip()
+                   for k, _, v in (line.partition(":") for line in lines[1:] if line)}
+
+        if headers.get("upgrade", "").lower() != "websocket":
+            with open(_VIEWER, "rb") as f:
+                body = f.read()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\n"
+                         + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+            writer.close()
+            return
+
+        accept = base64.b64encode(hashlib.sha1(
+            headers["sec-websocket-key"].encode() + _WS_GUID).digest())
+        writer.write(b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+                     b"Connection: Upgrade\r\nSec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        await writer.drain()
+
+        client = Client(writer)
+        self.clients.add(client)
+        sender = asyncio.create_task(self._send_loop(client))
+        try:
+            await self._read_loop(reader, writer)
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            writer.close()
+
+    async def _send_loop(self, client):
+        try:
+            while True:
+                data = await client.queue.get()
+                client.writer.write(data)
+                await client.writer.drain()
+                self.frames_sent += 1
+                self.bytes_sent += len(data)
+        except ConnectionError:
+            pass
+
+    async def _read_loop(self, reader, writer):
+        """Only control frames matter: answer pings, stop on close"""
+        while True:
+            b1, b2 = await reader.readexactly(2)
+            opcode, n = b1 & 0x0F, b2 & 0x7F
+            if n == 126:
+                n = struct.unpack("!H", await reader.readexactly(2))[0]
+            elif n == 127:
+                n = struct.unpack("!Q", await reader.readexactly(8))[0]
+            mask = await reader.readexactly(4) if b2 & 0x80 else b"\0\0\0\0"
+            data = bytes(c ^ mask[i % 4] for i, c in enumerate(await reader.readexactly(n)))
+            if opcode == 0x8:
+                writer.write(ws_frame(b"", 0x8))
+                return
+            if opcode == 0x9:
+                writer.write(ws_frame(data, 0xA))
+
+
+def capture_loop(loop, server, stop, failed):
+    """Capture thread; sets the `failed` future if the source stays dead"""
+    cap = open_frame_source()
+    seq = 0
+    failures = reopens = 0
+    try:
+        while not stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                failures += 1
+                if failures >= REOPEN_AFTER:
+                    if reopens >= MAX_REOPENS:
+                        loop.call_soon_threadsafe(failed.set_result, reopens)
+                        return
+                    reopens += 1
+                    print(f"No frame for {failures} reads, reopening the frame source")
+                    cap.release()
+                    cap = open_frame_source()
+                    failures = 0
+                time.sleep(0.1)
+                continue
+            failures = reopens = 0
+            seq += 1
+            rotated = cv.rotate(frame, ROTATION)
+            loop.call_soon_threadsafe(server.publish, seq, rotated)
+    finally:
+        cap.release()
+
+
+async def serve(port):
+    server = StreamServer()
+    stop = threading.Event()
+    loop = asyncio.get_running_loop()
+    failed = loop.create_future()
+    threading.Thread(target=capture_loop, args=(loop, server, stop, failed), daemon=True).start()
+
+    tcp = await asyncio.start_server(server.handle, "", port)
+    print(f"Raw radiometric stream on ws://0.0.0.0:{port}/ (viewer at http://0.0.0.0:{port}/)")
+    try:
+        async with tcp:
+            reopens = await failed
+    finally:
+        stop.set()
+    # Non-zero exit so a supervisor restarts the server
+    raise SystemExit(f"No frames after {reopens} reopens of the frame source")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket raw Y16 streaming server")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()